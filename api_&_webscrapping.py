@@ -1,9 +1,8 @@
 from threading import Thread
-import requests
 
-import base64
+import asr
+import webscrap
 from moviepy.editor import *
-url = "https://proxy.api.deepaffects.com/audio/generic/api/v1/async/asr"
 #"https://webhook.site/9a465f54-10e2-44a7-b8d6-989c17c9bf50"
 #
 
@@ -53,74 +52,26 @@ a4.join()
 #Test2: Final12: sample rate 1411000, enableSpeakerDiarization": False,audioType": "meeting, lang: eng-GB
 #Test3: Final13: sample rate 44100, enableSpeakerDiarization": False,audioType": "meeting,lang: eng-GB (uk)
 #Test4: Final14: sample rate 44100, enableSpeakerDiarization": False,audioType": "meeting,lang: eng-US
+# the audio is streamed base64 encoded by asr.submit, never read whole
 def one():
-    querystring1 = {"apikey": "i8gDv4qSRMSjLaW3iFjCSvcPGPv16caE",
-                    "webhook": "https://webhook.site/7396dbb9-c236-4997-aa62-571c8aca0ce7"}
-    audio_file_name1 = "mit1.wav"
-    with open(audio_file_name1, 'rb') as fin1:
-        audio_content1 = fin1.read()
-
-    payload1 = {"content":base64.b64encode(audio_content1).decode('utf-8'),"encoding": "WAV", "languageCode": "en-US", "sampleRate": 44100, "audioType": "meeting",
-               "enableSpeakerDiarization": False, "enablePunctuation": True}
-
-    #payload["content"] = base64.b64encode(audio_content1).decode('utf-8')
-    headers = {
-        'Content-Type': "application/json",
-    }
-    response = requests.post(url, json=payload1, headers=headers, params=querystring1)
-    print(response.text)
+    apikey, webhook = asr.KEYS[0]
+    asr.submit("mit1.wav", apikey, webhook, languageCode="en-US", sampleRate=44100)
 #SaWFpL5SZPtEhQYJRNKfFtXzxhhNcqwc
 #Due2ogG7EZnO9SS94SDNlsycExyqBHCh
 def two():
-    querystring2 = {"apikey": "YutmVabaOak8xQuHruvWuGsSURX7dY4N","webhook": "https://webhook.site/a703f1c6-b728-4562-9eee-a91d299c6f8f"}
-    audio_file_name2 = "mit2.wav"
-    with open(audio_file_name2, 'rb') as fin2:
-        audio_content2 = fin2.read()
-
-    payload2 = {"content": base64.b64encode(audio_content2).decode('utf-8'), "encoding": "WAV", "languageCode": "en-US",
-                "sampleRate": 44100, "audioType": "meeting",
-                "enableSpeakerDiarization": False, "enablePunctuation": True}
-
-    #payload["content"] = base64.b64encode(audio_content2).decode('utf-8')
-    headers = {
-        'Content-Type': "application/json",
-    }
-    response = requests.post(url, json=payload2, headers=headers, params=querystring2)
-    print(response.text)
+    apikey, webhook = asr.KEYS[1]
+    asr.submit("mit2.wav", apikey, webhook, languageCode="en-US", sampleRate=44100)
 def three():
-    querystring3 = {"apikey": "G0phDz499IRPLCJHSObdmsGI131LXhlr","webhook": "https://webhook.site/bb5f026f-6d96-46c8-ac50-5a4d45b79324"}
-
-    audio_file_name3 = "mit3.wav"
-    with open(audio_file_name3, 'rb') as fin3:
-        audio_content3 = fin3.read()
-    payload3 = {"content": base64.b64encode(audio_content3).decode('utf-8'), "encoding": "WAV", "languageCode": "en-US",
-                "sampleRate": 44100, "audioType": "meeting",
-                "enableSpeakerDiarization": False, "enablePunctuation": True}
-
-    #payload["content"] = base64.b64encode(audio_content3).decode('utf-8')
-    headers = {
-        'Content-Type': "application/json",
-    }
-    response = requests.post(url, json=payload3, headers=headers, params=querystring3)
-    print(response.text)
+    apikey, webhook = asr.KEYS[2]
+    asr.submit("mit3.wav", apikey, webhook, languageCode="en-US", sampleRate=44100)
 def four():
-    querystring4 = {"apikey": "n6oP99r1tGIZeyt77Zxn6LVMUKEtmhlw","webhook": "https://webhook.site/a5d6f48a-b29e-4f8f-96a3-badb60823be4"}
-    audio_file_name4 = "mit4.wav"
-    with open(audio_file_name4,'rb') as fin4:
-        audio_content4 = fin4.read()
-    payload4 = {"content": base64.b64encode(audio_content4).decode('utf-8'), "encoding": "WAV", "languageCode": "en-US",
-                "sampleRate": 44100, "audioType": "meeting",
-                "enableSpeakerDiarization": False, "enablePunctuation": True}
-
-    #payload["content"] = base64.b64encode(audio_content4).decode('utf-8')
-    headers = {
-        'Content-Type': "application/json",
-    }
-    response = requests.post(url, json=payload4, headers=headers, params=querystring4)
-    print(response.text)
+    apikey, webhook = asr.KEYS[3]
+    asr.submit("mit4.wav", apikey, webhook, languageCode="en-US", sampleRate=44100)
 
 flag=False
 print("started")
+# registered before uploading so an early answer is not missed
+pending = [webscrap.expect(segment) for segment in (1, 2, 3, 4)]
 t1=Thread(target =one)
 t2=Thread(target =two)
 t3=Thread(target =three)
@@ -133,24 +84,4 @@ t1.join()
 t2.join()
 t3.join()
 t4.join()
-def run1():
-    import webscrap
-def run2():
-   import webscrap2
-def run3():
-    import webscrap3
-def run4():
-    import webscrap4
-
-r1=Thread(target =run1)
-r2=Thread(target =run2)
-r3=Thread(target =run3)
-r4=Thread(target =run4)
-r1.start()
-r2.start()
-r3.start()
-r4.start()
-r1.join()
-r2.join()
-r3.join()
-r4.join()
+print(webscrap.fetchAll([1, 2, 3, 4], pending=pending))
@@ -0,0 +1,215 @@
+import os
+import json
+import base64
+import requests
+
+url = "https://proxy.api.deepaffects.com/audio/generic/api/v1/async/asr"
+
+# one (apikey, webhook) pair per segment, the transcripts are polled from the
+# webhook.site tokens by collector.WebhookSitePoller
+KEYS = [
+    ("i8gDv4qSRMSjLaW3iFjCSvcPGPv16caE", "https://webhook.site/7396dbb9-c236-4997-aa62-571c8aca0ce7"),
+    ("YutmVabaOak8xQuHruvWuGsSURX7dY4N", "https://webhook.site/a703f1c6-b728-4562-9eee-a91d299c6f8f"),
+    ("G0phDz499IRPLCJHSObdmsGI131LXhlr", "https://webhook.site/bb5f026f-6d96-46c8-ac50-5a4d45b79324"),
+    ("n6oP99r1tGIZeyt77Zxn6LVMUKEtmhlw", "https://webhook.site/a5d6f48a-b29e-4f8f-96a3-badb60823be4"),
+]
+
+
+# The JSON request body {"content": <base64 of the file>, **fields}, produced
+# while it is being sent: the audio is read and encoded CHUNK bytes at a time,
+# so memory stays flat however long the segment is.  len() is known up front
+# so requests sends a Content-Length instead of a chunked body.
+class Base64JsonBody(object):
+    CHUNK = 3 * 64 * 1024
+
+    def __init__(self, path, fields):
+        self.path = path
+        size = os.path.getsize(path)
+        self.head = b'{"content": "'
+        self.tail = ('", ' + json.dumps(fields)[1:]).encode('utf-8')
+        self.length = len(self.head) + 4 * ((size + 2) // 3) + len(self.tail)
+        self.fin = None
+        # encoded bytes not read yet start at self.offset of self.buffer
+        self.buffer = bytearray()
+        self.offset = 0
+        self.done = False
+
+    def __len__(self):
+        return self.length
+
+    def _parts(self):
+        yield self.head
+        with open(self.path, 'rb') as fin:
+            while True:
+                chunk = fin.read(self.CHUNK)
+                if not chunk:
+                    break
+                yield base64.b64encode(chunk)
+        yield self.tail
+
+    def read(self, size=-1):
+        if self.fin is None:
+            self.fin = self._parts()
+        while not self.done and (size < 0 or len(self.buffer) - self.offset < size):
+            try:
+                part = next(self.fin)
+            except StopIteration:
+                self.done = True
+                break
+            # drop what was read before growing the buffer, so every read
+            # copies at most size + CHUNK bytes
+            del self.buffer[:self.offset]
+            self.offset = 0
+            self.buffer += part
+        if size < 0:
+            size = len(self.buffer) - self.offset
+        data = bytes(self.buffer[self.offset:self.offset + size])
+        self.offset += len(data)
+        return data
+
+
+# Test: Final11: sample rate 1411000, enableSpeakerDiarization": False,audioType": "meeting
+# Test2: Final12: sample rate 1411000, enableSpeakerDiarization": False,audioType": "meeting, lang: eng-GB
+# Test3: Final13: sample rate 44100, enableSpeakerDiarization": False,audioType": "meeting,lang: eng-GB (uk)
+# Test4: Final14: sample rate 44100, enableSpeakerDiarization": False,audioType": "meeting,lang: eng-US
+def submit(audio_file_name, apikey, webhook, languageCode="en-IN", sampleRate=44100):
+    querystring = {"apikey": apikey, "webhook": webhook}
+    encoding = "FLAC" if audio_file_name.lower().endswith(".flac") else "WAV"
+
+    payload = {"encoding": encoding,
+               "languageCode": languageCode, "sampleRate": sampleRate, "audioType": "meeting",
+               "enableSpeakerDiarization": False, "enablePunctuation": True}
+
+    headers = {
+        'Content-Type': "application/json",
+    }
+    response = requests.post(url, data=Base64JsonBody(audio_file_name, payload), headers=headers,
+                             params=querystring)
+    print(response.text)
+    return response
+
+
+# What the pipeline calls for every audio segment.  transcribe() returns the
+# transcript in the DeepAffects shape
+#     {"response": {"transcript": "...", "words": [{"word", "start", "end"}, ...]}}
+# with times relative to the segment, or, for asynchronous backends, a
+# concurrent.futures.Future resolving to it.  key identifies the segment
+# across jobs ("<job id>/<segment number>").  Backends are created by name
+# with backend().
+class ASRBackend(object):
+    name = None
+    # the segment formats transcribe() reads
+    formats = ("wav", "flac")
+    # most segments a job can send, None for no limit
+    slots = None
+    # True if only one job at a time may have segments in flight
+    exclusive = False
+
+    def transcribe(self, segment, index, sampleRate=16000, languageCode="en-IN", key=None):
+        raise NotImplementedError
+
+
+# The DeepAffects async api.  With a collector.WebhookReceiver every segment
+# gets its own webhook on our server, so any number of segments and jobs can
+# be in flight; otherwise results are polled from the webhook.site tokens in
+# KEYS, one segment per token and one job at a time.
+class DeepAffectsBackend(ASRBackend):
+    name = "deepaffects"
+
+    def __init__(self, keys=None, receiver=None, poller=None):
+        import collector
+
+        self.keys = keys or KEYS
+        self.receiver = receiver
+        self.poller = poller or collector.WebhookSitePoller()
+        if receiver is None:
+            self.slots = len(self.keys)
+            self.exclusive = True
+
+    def transcribe(self, segment, index, sampleRate=16000, languageCode="en-IN", key=None):
+        if self.receiver is not None:
+            apikey = self.keys[index % len(self.keys)][0]
+            webhook = self.receiver.url(key or str(index + 1))
+            future = self.receiver.expect(key or str(index + 1))
+        else:
+            if index >= len(self.keys):
+                raise ValueError("segment %d but only %d DeepAffects keys/webhooks are configured"
+                                 % (index + 1, len(self.keys)))
+            apikey, webhook = self.keys[index]
+            future = self.poller.expect(webhook)
+        try:
+            submit(segment, apikey, webhook, languageCode=languageCode, sampleRate=sampleRate).raise_for_status()
+        except Exception:
+            future.cancel()
+            raise
+        return future
+
+
+# Offline recognition on the CPU with Vosk (https://alphacephei.com/vosk/),
+# model is the path of an unpacked model directory
+class VoskBackend(ASRBackend):
+    name = "vosk"
+    formats = ("wav",)
+
+    def __init__(self, model):
+        from vosk import Model
+
+        self.model = Model(model)
+
+    def transcribe(self, segment, index, sampleRate=16000, languageCode="en-IN", key=None):
+        import wave
+        from vosk import KaldiRecognizer
+
+        wf = wave.open(segment, "rb")
+        rec = KaldiRecognizer(self.model, wf.getframerate())
+        rec.SetWords(True)
+        results = []
+        while True:
+            data = wf.readframes(4000)
+            if not data:
+                break
+            if rec.AcceptWaveform(data):
+                results.append(json.loads(rec.Result()))
+        results.append(json.loads(rec.FinalResult()))
+        wf.close()
+
+        # every Vosk result is one utterance, end it with a full stop so the
+        # NLP can split the transcript into sentences
+        sentences = []
+        words = []
+        for result in results:
+            utterance = [{"word": w["word"], "start": w["start"], "end": w["end"]} for w in result.get("result", [])]
+            if not utterance:
+                continue
+            utterance[-1]["word"] += "."
+            words += utterance
+            sentences.append(" ".join(w["word"] for w in utterance))
+        return {"response": {"transcript": " ".join(sentences), "words": words}}
+
+
+# Synchronous client of the local mock server in mockasr.py
+class MockBackend(ASRBackend):
+    name = "mock"
+
+    def __init__(self, url="http://127.0.0.1:8765/asr"):
+        self.url = url
+
+    def transcribe(self, segment, index, sampleRate=16000, languageCode="en-IN", key=None):
+        encoding = "FLAC" if segment.lower().endswith(".flac") else "WAV"
+        payload = {"encoding": encoding, "languageCode": languageCode, "sampleRate": sampleRate}
+        response = requests.post(self.url, data=Base64JsonBody(segment, payload),
+                                 headers={'Content-Type': "application/json"})
+        response.raise_for_status()
+        return response.json()
+
+
+backends = {
+    DeepAffectsBackend.name: DeepAffectsBackend,
+    VoskBackend.name: VoskBackend,
+    MockBackend.name: MockBackend,
+}
+
+
+# the backend called name, made with the keyword arguments of its constructor
+def backend(name, *args, **kwargs):
+    return backends[name](*args, **kwargs)
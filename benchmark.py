@@ -0,0 +1,141 @@
+# Timings for pipeline stages, reproducible without the DeepAffects api.
+#
+#     python benchmark.py extract lecture.mp4 --parts 8
+#     python benchmark.py asr lecture_parts/v*.wav --backend mock
+#     python benchmark.py stopwords lecture_parts/1.txt
+import os
+import sys
+import time
+import shutil
+import string
+import argparse
+import tempfile
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+# wall clock of silence detection + audio extraction for 1, 2, 4 .. N workers
+def extract(args):
+    import media
+
+    source = media.MediaSource(args.video)
+    duration = source.duration
+    maxWorkers = args.workers or media.cpuWorkers()
+    counts = sorted(set([1] + [2 ** i for i in range(1, maxWorkers.bit_length()) if 2 ** i < maxWorkers] +
+                        [maxWorkers]))
+
+    print("%s: %.1f s of audio, %d segments" % (os.path.basename(args.video), duration, args.parts))
+    print("%8s %10s %10s %10s %8s" % ("workers", "envelope", "extract", "total", "speedup"))
+    base = None
+    for workers in counts:
+        workdir = tempfile.mkdtemp(prefix="bench_extract_")
+        try:
+            tCuts, cuts = timed(media.segmentCuts, args.video, duration, args.parts, workers=workers)
+            tExtract, _ = timed(media.extractAudioSegments, args.video, cuts,
+                                os.path.join(workdir, "v%d.wav"), workers=workers)
+        finally:
+            shutil.rmtree(workdir)
+        total = tCuts + tExtract
+        base = base or total
+        print("%8d %9.2fs %9.2fs %9.2fs %7.2fx" % (workers, tCuts, tExtract, total, base / total))
+
+
+# transcription throughput of one backend over a set of segment files, all
+# segments in flight at once like the pipeline sends them
+def transcribe(args):
+    import wave
+    import asr
+    from concurrent.futures import ThreadPoolExecutor
+
+    if args.backend == "mock" and args.url is None:
+        import mockasr
+
+        server, args.url = mockasr.start(latency=args.latency)
+    if args.backend == "mock":
+        backend = asr.backend("mock", url=args.url)
+    else:
+        backend = asr.backend("vosk", model=args.model)
+
+    audio = 0.0
+    for segment in args.segments:
+        wf = wave.open(segment, "rb")
+        audio += wf.getnframes() / float(wf.getframerate())
+        wf.close()
+
+    def one(i):
+        return backend.transcribe(args.segments[i], i)
+
+    for run in range(args.repeat):
+        with ThreadPoolExecutor(max_workers=len(args.segments)) as pool:
+            t, results = timed(lambda: list(pool.map(one, range(len(args.segments)))))
+        words = sum(len(r["response"]["words"]) for r in results)
+        print("run %d: %d segments, %.1f s of audio, %d words in %.2fs (%.1fx realtime)"
+              % (run + 1, len(args.segments), audio, words, t, audio / t))
+
+
+# per token cost of stopword filtering: the old list rebuilt for every token
+# against the frozenset of nlp.stopwordSet
+def stopwords(args):
+    import nlp
+    from nltk.corpus import stopwords as corpus
+
+    with open(args.transcript) as fi:
+        text = fi.read()
+    words = text.split()[:args.words]
+    languages = tuple(args.language) if args.language else None
+
+    def listFilter():
+        table = str.maketrans("", "", string.punctuation)
+        cleansed = " ".join(w.translate(table) for w in words).split()
+        if languages:
+            return [w for w in cleansed if not w.lower() in [s for l in languages for s in corpus.words(l)]]
+        return [w for w in cleansed if not w.lower() in corpus.words()]
+
+    tLoad, _ = timed(nlp.stopwordSet, languages)
+    tList, old = timed(listFilter)
+    tSet, new = timed(nlp.contentTokens, " ".join(words), None, languages)
+    assert old == new
+    print("%d tokens, %d kept, stopword set loaded in %.3fs" % (len(words), len(new), tLoad))
+    print("%8s %12s %14s" % ("", "total", "per token"))
+    for name, t in (("list", tList), ("set", tSet)):
+        print("%8s %11.4fs %12.2fus" % (name, t, 1e6 * t / max(len(words), 1)))
+    print("speedup %.0fx" % (tList / tSet))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks for the summarization pipeline.")
+    sub = parser.add_subparsers(dest="command")
+    sub.required = True
+
+    p = sub.add_parser("extract", help="audio extraction scaling from 1 to N worker threads, each running its own ffmpeg process")
+    p.add_argument("video", help="a long input video")
+    p.add_argument("--parts", type=int, default=8, help="number of segments to cut")
+    p.add_argument("--workers", type=int, default=None, help="largest worker count (default: one per core)")
+    p.set_defaults(func=extract)
+
+    p = sub.add_parser("asr", help="transcription throughput of an ASR backend")
+    p.add_argument("segments", nargs="+", help="WAV segment files, e.g. a job's v1.wav .. vN.wav")
+    p.add_argument("--backend", default="mock", choices=["mock", "vosk"])
+    p.add_argument("--url", default=None, help="mock server address (default: start one in process)")
+    p.add_argument("--latency", type=float, default=0.0, help="answer delay of the in process mock server")
+    p.add_argument("--model", default="model", help="Vosk model directory")
+    p.add_argument("--repeat", type=int, default=3)
+    p.set_defaults(func=transcribe)
+
+    p = sub.add_parser("stopwords", help="per token cost of stopword filtering")
+    p.add_argument("transcript", help="a plain text transcript, e.g. a job's 1.txt")
+    p.add_argument("--words", type=int, default=1000, help="tokens to filter (the list version is slow)")
+    p.add_argument("--language", action="append", default=None, help="nltk stopword language, repeatable")
+    p.set_defaults(func=stopwords)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,111 @@
+# Persistent SQLite store of ASR transcripts, so a video that was already seen
+# skips extraction and the ASR round trip.  Segment transcripts are keyed by a
+# hash of the segment audio plus the ASR parameters; a second table maps a
+# video fingerprint plus the segmentation parameters to its cuts and segment
+# keys.  The store is bounded to maxBytes of transcripts, least recently used
+# entries are evicted first.
+import os
+import json
+import time
+import sqlite3
+import hashlib
+from threading import Lock
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "video-summarizer", "transcripts.sqlite")
+
+
+def fileHash(path, blockSize=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as fin:
+        while True:
+            block = fin.read(blockSize)
+            if not block:
+                break
+            h.update(block)
+    return h.hexdigest()
+
+
+# cheap content fingerprint of a (possibly huge) video: its size and three
+# 1 MiB samples from the start, middle and end
+def videoFingerprint(path, sample=1 << 20):
+    size = os.path.getsize(path)
+    h = hashlib.sha256(str(size).encode())
+    with open(path, "rb") as fin:
+        for offset in (0, max(size // 2 - sample // 2, 0), max(size - sample, 0)):
+            fin.seek(offset)
+            h.update(fin.read(sample))
+    return h.hexdigest()
+
+
+def paramsKey(prefix, **params):
+    return prefix + ":" + json.dumps(params, sort_keys=True)
+
+
+class TranscriptCache(object):
+
+    def __init__(self, path=DEFAULT_PATH, maxBytes=256 << 20):
+        self.path = path
+        self.maxBytes = maxBytes
+        self.lock = Lock()
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        with self._connect() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS transcripts "
+                       "(key TEXT PRIMARY KEY, value TEXT, size INTEGER, used REAL)")
+            db.execute("CREATE TABLE IF NOT EXISTS videos (key TEXT PRIMARY KEY, value TEXT, used REAL)")
+            db.execute("CREATE INDEX IF NOT EXISTS transcripts_used ON transcripts (used)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def segmentKey(self, segment, backend, sampleRate, languageCode):
+        return paramsKey(fileHash(segment), backend=backend, sampleRate=sampleRate, languageCode=languageCode)
+
+    def videoKey(self, video, **params):
+        return paramsKey(videoFingerprint(video), **params)
+
+    def _get(self, table, key):
+        with self.lock, self._connect() as db:
+            row = db.execute("SELECT value FROM %s WHERE key = ?" % table, (key,)).fetchone()
+            if row is None:
+                return None
+            db.execute("UPDATE %s SET used = ? WHERE key = ?" % table, (time.time(), key))
+        return json.loads(row[0])
+
+    def get(self, key):
+        return self._get("transcripts", key)
+
+    def put(self, key, result):
+        value = json.dumps(result)
+        with self.lock, self._connect() as db:
+            db.execute("INSERT OR REPLACE INTO transcripts VALUES (?, ?, ?, ?)",
+                       (key, value, len(value), time.time()))
+            self._evict(db)
+
+    def _evict(self, db):
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM transcripts").fetchone()[0]
+        if total <= self.maxBytes:
+            return
+        for key, size in db.execute("SELECT key, size FROM transcripts ORDER BY used").fetchall():
+            db.execute("DELETE FROM transcripts WHERE key = ?", (key,))
+            total -= size
+            if total <= self.maxBytes:
+                break
+
+    # {"cuts": [(start, end), ...], "segments": [segment keys]} or None; only
+    # returned while every segment transcript is still in the cache
+    def getVideo(self, key):
+        video = self._get("videos", key)
+        if video is None:
+            return None
+        transcripts = [self.get(segment) for segment in video["segments"]]
+        if any(t is None for t in transcripts):
+            return None
+        video["transcripts"] = transcripts
+        return video
+
+    def putVideo(self, key, cuts, segments):
+        with self.lock, self._connect() as db:
+            db.execute("INSERT OR REPLACE INTO videos VALUES (?, ?, ?)",
+                       (key, json.dumps({"cuts": cuts, "segments": segments}), time.time()))
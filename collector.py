@@ -0,0 +1,125 @@
+# Waits for the transcripts of asynchronous ASR requests without busy loops.
+# One asyncio event loop runs in a background thread; every submitted segment
+# gets a concurrent.futures.Future that resolves to the transcript dict, either
+# when webhook.site shows a new request (WebhookSitePoller, polled with
+# exponential backoff) or when the ASR posts it to our own embedded HTTP
+# server (WebhookReceiver).  Waiting for N segments costs no CPU.
+import json
+import asyncio
+import requests
+from threading import Thread, Lock
+
+_loop = None
+_loopLock = Lock()
+
+
+# the shared event loop, started on first use
+def eventLoop():
+    global _loop
+    with _loopLock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            Thread(target=_loop.run_forever, name="collector", daemon=True).start()
+    return _loop
+
+
+def run(coro):
+    return asyncio.run_coroutine_threadsafe(coro, eventLoop())
+
+
+class WebhookSitePoller(object):
+    TOKEN_URL = "https://webhook.site/token/%s"
+
+    def __init__(self, first=0.5, factor=2.0, maximum=15.0, timeout=3600.0):
+        self.first = first
+        self.factor = factor
+        self.maximum = maximum
+        self.timeout = timeout
+
+    @staticmethod
+    def token(webhook):
+        return webhook.rstrip("/").rsplit("/", 1)[-1]
+
+    def latest(self, token):
+        page = requests.get(self.TOKEN_URL % token, timeout=30)
+        page.raise_for_status()
+        return page.json()['latest_request_id']
+
+    def raw(self, token, requestId):
+        page = requests.get((self.TOKEN_URL % token) + '/request/' + str(requestId) + '/raw', timeout=30)
+        page.raise_for_status()
+        return json.loads(page.content)
+
+    # call before submitting: the current latest request is read now, so an
+    # answer arriving before the first poll is not missed
+    def expect(self, webhook):
+        token = self.token(webhook)
+        return run(self._wait(token, self.latest(token)))
+
+    async def _wait(self, token, baseline):
+        loop = asyncio.get_event_loop()
+        deadline = loop.time() + self.timeout
+        delay = self.first
+        while True:
+            latest = await loop.run_in_executor(None, self.latest, token)
+            if latest != baseline:
+                return await loop.run_in_executor(None, self.raw, token, latest)
+            if loop.time() + delay > deadline:
+                raise TimeoutError("no ASR result on webhook.site token %s after %.0fs" % (token, self.timeout))
+            await asyncio.sleep(delay)
+            delay = min(delay * self.factor, self.maximum)
+
+
+# Minimal HTTP server on the collector loop.  The ASR posts the result of
+# segment `key` to url(key); publicUrl is the address it can reach us at
+# (e.g. a tunnel or load balancer in front of host:port).
+class WebhookReceiver(object):
+
+    def __init__(self, host="0.0.0.0", port=8790, publicUrl=None, timeout=3600.0):
+        self.timeout = timeout
+        self.pending = {}
+        self.server = run(asyncio.start_server(self._handle, host, port)).result()
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.publicUrl = (publicUrl or "http://%s:%d" % (host, self.port)).rstrip("/")
+
+    def url(self, key):
+        return "%s/%s" % (self.publicUrl, key)
+
+    def expect(self, key):
+        return run(self._wait(key))
+
+    def _future(self, key):
+        if key not in self.pending:
+            self.pending[key] = asyncio.get_event_loop().create_future()
+        return self.pending[key]
+
+    async def _wait(self, key):
+        try:
+            return await asyncio.wait_for(self._future(key), self.timeout)
+        finally:
+            self.pending.pop(key, None)
+
+    async def _handle(self, reader, writer):
+        try:
+            method, path, _ = (await reader.readline()).decode("latin-1").split(" ", 2)
+            length = 0
+            while True:
+                line = (await reader.readline()).decode("latin-1").strip()
+                if not line:
+                    break
+                name, _, value = line.partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+            body = await reader.readexactly(length)
+            future = self._future(path.strip("/"))
+            if method == "POST" and not future.done():
+                future.set_result(json.loads(body))
+            status = "200 OK"
+        except (ValueError, asyncio.IncompleteReadError):
+            status = "400 Bad Request"
+        writer.write(("HTTP/1.1 %s\r\nContent-Length: 0\r\nConnection: close\r\n\r\n" % status).encode("latin-1"))
+        await writer.drain()
+        writer.close()
+
+    def close(self):
+        self.server.close()
@@ -0,0 +1,354 @@
+# Local store of Wikipedia pages (summary + links) and of finished topic
+# expansions for nlp.superImportant, so keyword expansion is read from disk
+# instead of hundreds of HTTP requests per run.  Fetched entries expire after
+# `ttl` seconds and the least recently used pages are evicted beyond
+# maxPages.  Pages can also be imported offline from a Wikipedia XML dump:
+#
+#     python keyphrases.py import enwiki-pages-articles-subset.xml.bz2 --titles titles.txt
+import os
+import re
+import sys
+import bz2
+import json
+import time
+import sqlite3
+import argparse
+from threading import Lock
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+API = "https://en.wikipedia.org/w/api.php"
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "video-summarizer", "keyphrases.sqlite")
+
+# titles per wikipedia query when resolving phrases, the api's limit
+RESOLVE_BATCH = 50
+
+# pages imported from a dump are stored with this fetch time and never expire
+IMPORTED = 0
+
+
+class PageError(Exception):
+    pass
+
+
+# at most `rate` requests per second to each host, shared by all threads
+class RateLimiter(object):
+
+    def __init__(self, rate=10.0):
+        self.interval = 1.0 / rate
+        self.lock = Lock()
+        self.next = {}
+
+    def wait(self, url):
+        host = urlparse(url).netloc
+        with self.lock:
+            now = time.time()
+            at = max(now, self.next.get(host, now))
+            self.next[host] = at + self.interval
+        if at > now:
+            time.sleep(at - now)
+
+
+class KeyphraseStore(object):
+
+    def __init__(self, path=DEFAULT_PATH, ttl=30 * 24 * 3600, maxPages=200000, offline=False,
+                 workers=8, rate=10.0, timeout=10.0, retries=3):
+        self.path = path
+        self.ttl = ttl
+        self.maxPages = maxPages
+        # never go to the network, missing pages count as failures
+        self.offline = offline
+        # network fetches: parallel requests, requests per second per host,
+        # seconds per request and attempts per page
+        self.workers = workers
+        self.limiter = RateLimiter(rate)
+        self.timeout = timeout
+        self.retries = retries
+        self.stats = {"stored": 0, "fetched": 0, "retried": 0, "failed": 0}
+        self.lock = Lock()
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        with self._connect() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS pages "
+                       "(title TEXT PRIMARY KEY, summary TEXT, links TEXT, fetched REAL, used REAL)")
+            db.execute("CREATE TABLE IF NOT EXISTS expansions "
+                       "(topic TEXT PRIMARY KEY, words TEXT, fetched REAL, used REAL)")
+            db.execute("CREATE INDEX IF NOT EXISTS pages_used ON pages (used)")
+            db.execute("CREATE INDEX IF NOT EXISTS pages_title_nocase ON pages (title COLLATE NOCASE)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _fresh(self, fetched):
+        return fetched == IMPORTED or time.time() - fetched < self.ttl
+
+    def _lookup(self, table, column, key):
+        with self.lock, self._connect() as db:
+            row = db.execute("SELECT * FROM %s WHERE %s = ?" % (table, column), (key,)).fetchone()
+            if row is not None:
+                db.execute("UPDATE %s SET used = ? WHERE %s = ?" % (table, column), (time.time(), key))
+        return row
+
+    def _count(self, name):
+        with self.lock:
+            self.stats[name] += 1
+
+    # (summary, links) of a page, from the store or else from wikipedia;
+    # raises PageError for missing and disambiguation pages or when every
+    # attempt failed
+    def page(self, title):
+        row = self._lookup("pages", "title", title)
+        if row is not None and (self._fresh(row[3]) or self.offline):
+            self._count("stored")
+            return row[1], json.loads(row[2])
+        if self.offline:
+            self._count("failed")
+            raise PageError("%s is not in the keyphrase store" % title)
+
+        try:
+            summary, links = self._fetch(title)
+        except Exception:
+            if row is not None:
+                # stale is better than nothing
+                self._count("stored")
+                return row[1], json.loads(row[2])
+            self._count("failed")
+            raise
+        self._count("fetched")
+        self.putPage(title, summary, links, time.time())
+        return summary, links
+
+    # title of the page for a phrase: the stored page with that title in any
+    # case, else (online) the page wikipedia resolves it to; None if there is none
+    def resolve(self, phrase):
+        return self.resolveAll([phrase])[phrase]
+
+    # {title: fn(title)} for many titles, called by a bounded thread pool so
+    # the time is set by the slowest page, not the sum
+    def _map(self, fn, titles):
+        titles = list(dict.fromkeys(titles))
+        if not titles:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(titles))) as pool:
+            return dict(zip(titles, pool.map(fn, titles)))
+
+    # {title: (summary, links) or the exception} for many pages
+    def pages(self, titles):
+        def one(title):
+            try:
+                return self.page(title)
+            except Exception as e:
+                return e
+
+        return self._map(one, titles)
+
+    # {phrase: resolve(phrase)} for many phrases.  Phrases without a stored
+    # page are looked up RESOLVE_BATCH at a time by a query that only follows
+    # wikipedia's normalization and redirects, so nothing is fetched or stored
+    # for phrases that are never used as topics.
+    def resolveAll(self, phrases):
+        phrases = list(dict.fromkeys(phrases))
+        titles = dict()
+        with self.lock, self._connect() as db:
+            for phrase in phrases:
+                row = db.execute("SELECT title FROM pages WHERE title = ? COLLATE NOCASE", (phrase,)).fetchone()
+                titles[phrase] = row[0] if row is not None else None
+        missing = [phrase for phrase in phrases if titles[phrase] is None]
+        if self.offline or not missing:
+            return titles
+        batches = [tuple(missing[i:i + RESOLVE_BATCH]) for i in range(0, len(missing), RESOLVE_BATCH)]
+        for resolved in self._map(self._resolveBatch, batches).values():
+            titles.update(resolved)
+        return titles
+
+    # {phrase: title} of the existing, non disambiguation pages the phrases
+    # normalize or redirect to, None for the others
+    def _resolveBatch(self, phrases):
+        try:
+            query = self._get({"action": "query", "prop": "pageprops", "ppprop": "disambiguation",
+                               "redirects": 1, "titles": "|".join(phrases)})["query"]
+        except Exception:
+            return dict((phrase, None) for phrase in phrases)
+        moved = dict((item["from"], item["to"]) for item in query.get("normalized", []) + query.get("redirects", []))
+        pages = set(page["title"] for page in query.get("pages", [])
+                    if not page.get("missing") and not page.get("invalid")
+                    and "disambiguation" not in page.get("pageprops", {}))
+        titles = dict()
+        for phrase in phrases:
+            title = phrase
+            seen = set()
+            while title in moved and title not in seen:
+                seen.add(title)
+                title = moved[title]
+            titles[phrase] = title if title in pages else None
+        return titles
+
+    def _get(self, params):
+        import requests
+
+        params = dict(params, format="json", formatversion=2)
+        for attempt in range(self.retries):
+            self.limiter.wait(API)
+            try:
+                response = requests.get(API, params=params, timeout=self.timeout,
+                                        headers={"User-Agent": "Intelligent-video-summarizer"})
+                if response.status_code != 429 and response.status_code < 500:
+                    response.raise_for_status()
+                    return response.json()
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.retries - 1:
+                    raise
+            self._count("retried")
+            time.sleep(0.5 * 2 ** attempt)
+        raise PageError("wikipedia kept failing for %s" % params.get("titles"))
+
+    # lead section as plain text (what wikipedia.summary returns) and every
+    # article link of the page
+    def _fetch(self, title):
+        params = {"action": "query", "prop": "extracts|pageprops|links", "exintro": 1, "explaintext": 1,
+                  "ppprop": "disambiguation", "plnamespace": 0, "pllimit": "max", "redirects": 1,
+                  "titles": title}
+        summary = None
+        links = []
+        while True:
+            data = self._get(params)
+            page = data["query"]["pages"][0]
+            if page.get("missing") or page.get("invalid"):
+                raise PageError("%s does not exist" % title)
+            if "disambiguation" in page.get("pageprops", {}):
+                raise PageError("%s is a disambiguation page" % title)
+            if summary is None:
+                summary = page.get("extract", "")
+            links += [link["title"] for link in page.get("links", [])]
+            if "continue" not in data:
+                return summary, links
+            params = dict(params, **data["continue"])
+
+    def putPage(self, title, summary, links, fetched):
+        with self.lock, self._connect() as db:
+            db.execute("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?)",
+                       (title, summary, json.dumps(links), fetched, time.time()))
+            self._evict(db)
+
+    def _evict(self, db):
+        extra = db.execute("SELECT COUNT(*) FROM pages").fetchone()[0] - self.maxPages
+        if extra > 0:
+            db.execute("DELETE FROM pages WHERE title IN "
+                       "(SELECT title FROM pages WHERE fetched != ? ORDER BY used LIMIT ?)", (IMPORTED, extra))
+
+    def expansion(self, topic):
+        row = self._lookup("expansions", "topic", topic)
+        if row is not None and (self._fresh(row[2]) or self.offline):
+            return set(json.loads(row[1]))
+        return None
+
+    def putExpansion(self, topic, words):
+        with self.lock, self._connect() as db:
+            db.execute("INSERT OR REPLACE INTO expansions VALUES (?, ?, ?, ?)",
+                       (topic, json.dumps(sorted(words)), time.time(), time.time()))
+
+    # Reads pages from a pages-articles XML dump (optionally .bz2), keeping
+    # only `titles` if given.  The summary is the lead section with the wiki
+    # markup stripped, links are the [[targets]] of the whole page.
+    def importDump(self, dump, titles=None):
+        import xml.etree.ElementTree as ET
+
+        fin = bz2.open(dump, "rb") if dump.endswith(".bz2") else open(dump, "rb")
+        count = 0
+        title = None
+        rows = []
+        for event, elem in ET.iterparse(fin):
+            tag = elem.tag.rsplit("}", 1)[-1]
+            if tag == "title":
+                title = elem.text
+            elif tag == "text" and title and (titles is None or title in titles):
+                text = elem.text or ""
+                if not text.lower().startswith("#redirect"):
+                    rows.append((title, leadSummary(text), json.dumps(wikiLinks(text)), IMPORTED, time.time()))
+            elif tag == "page":
+                elem.clear()
+                title = None
+            if len(rows) >= 1000:
+                count += self._insert(rows)
+                rows = []
+        count += self._insert(rows)
+        fin.close()
+        return count
+
+    def _insert(self, rows):
+        with self.lock, self._connect() as db:
+            db.executemany("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+
+_default = None
+_defaultLock = Lock()
+
+
+def defaultStore():
+    global _default
+    with _defaultLock:
+        if _default is None:
+            _default = KeyphraseStore()
+    return _default
+
+
+def setDefaultStore(store):
+    global _default
+    with _defaultLock:
+        _default = store
+
+
+_link = re.compile(r"\[\[([^\]|#]+)(?:#[^\]|]*)?(?:\|([^\]]*))?\]\]")
+
+
+def wikiLinks(text):
+    links = []
+    seen = set()
+    for target, label in _link.findall(text):
+        target = target.strip()
+        if ":" in target or target in seen:
+            continue
+        seen.add(target)
+        links.append(target)
+    return links
+
+
+def leadSummary(text):
+    lead = text.split("\n==", 1)[0]
+    # templates (possibly nested), references, comments, tables
+    previous = None
+    while previous != lead:
+        previous = lead
+        lead = re.sub(r"\{\{[^{}]*\}\}", "", lead)
+    lead = re.sub(r"<ref[^>]*/>|<ref.*?</ref>|<!--.*?-->", "", lead, flags=re.S)
+    lead = re.sub(r"\{\|.*?\|\}", "", lead, flags=re.S)
+    lead = re.sub(r"\[\[(?:File|Image|Category):[^\]]*\]\]", "", lead)
+    lead = _link.sub(lambda m: m.group(2) or m.group(1), lead)
+    lead = re.sub(r"'{2,}", "", lead)
+    lead = re.sub(r"<[^>]+>", "", lead)
+    return " ".join(lead.split())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the local Wikipedia keyphrase store.")
+    parser.add_argument("--store", default=DEFAULT_PATH, help="store database")
+    sub = parser.add_subparsers(dest="command")
+    sub.required = True
+    p = sub.add_parser("import", help="import pages from a pages-articles XML dump (.xml or .xml.bz2)")
+    p.add_argument("dump")
+    p.add_argument("--titles", default=None, help="file with one page title per line to keep")
+    args = parser.parse_args(argv)
+
+    store = KeyphraseStore(args.store)
+    titles = None
+    if args.titles:
+        with open(args.titles, encoding="utf-8") as fi:
+            titles = set(line.strip() for line in fi if line.strip())
+    print("imported %d pages" % store.importDump(args.dump, titles))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,369 @@
+import os
+import re
+import math
+import subprocess
+from queue import Queue
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from contextlib import contextmanager
+import numpy as np
+from moviepy.config import get_setting
+
+FFMPEG = get_setting("FFMPEG_BINARY")
+
+
+# One input video shared by every stage of a job.  Metadata comes from a single
+# probe (no decoder is started for it) and decoders are VideoFileClips handed
+# out from a pool of at most `readers`, created only when a stage needs one.
+class MediaSource(object):
+
+    def __init__(self, path, readers=2):
+        self.path = path
+        self.readers = readers
+        self._infos = None
+        self._created = 0
+        self._clips = []
+        self._idle = Queue()
+        self._lock = Lock()
+
+    def infos(self):
+        if self._infos is None:
+            from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+
+            self._infos = ffmpeg_parse_infos(self.path)
+        return self._infos
+
+    @property
+    def duration(self):
+        return self.infos()["duration"]
+
+    # with source.reader() as clip: ... borrows a decoder, blocking while all
+    # `readers` of them are in use
+    @contextmanager
+    def reader(self):
+        with self._lock:
+            if self._idle.empty() and self._created < self.readers:
+                from moviepy.editor import VideoFileClip
+
+                self._created += 1
+                clip = VideoFileClip(self.path)
+                self._clips.append(clip)
+                self._idle.put(clip)
+        clip = self._idle.get()
+        try:
+            yield clip
+        finally:
+            self._idle.put(clip)
+
+    def close(self):
+        with self._lock:
+            for clip in self._clips:
+                clip.close()
+            self._clips = []
+            self._created = 0
+            self._idle = Queue()
+
+
+def cpuWorkers():
+    return os.cpu_count() or 1
+
+
+# output is the ffmpeg output arguments, ending with the file name (or pattern);
+# a .flac name gives lossless FLAC, about half the size of the WAV
+def _decodeAudio(video, start, end, fps, nchannels, output):
+    codec = "flac" if output[-1].lower().endswith(".flac") else "pcm_s16le"
+    cmd = [FFMPEG, "-y", "-loglevel", "error",
+           "-ss", "%.3f" % start, "-t", "%.3f" % (end - start), "-i", video,
+           "-vn", "-map", "0:a:0", "-acodec", codec, "-ar", str(fps), "-ac", str(nchannels)]
+    subprocess.check_call(cmd + output)
+
+
+# Writes the audio of contiguous (start, end) cuts of a video to one WAV (or
+# FLAC) per cut ("v%d.wav" style pattern, numbered from 1), by default already
+# downmixed and resampled to the 16 kHz mono the ASR needs.  Only the audio stream is demuxed
+# and decoded, the video is never re-encoded.  With one worker this is a single
+# ffmpeg pass; with more, every cut is decoded by its own ffmpeg process,
+# started and waited on from a thread pool.
+def extractAudioSegments(video, cuts, pattern, fps=16000, nchannels=1, workers=1):
+    paths = [pattern % (i + 1) for i in range(len(cuts))]
+    if len(cuts) == 1:
+        _decodeAudio(video, cuts[0][0], cuts[0][1], fps, nchannels, paths)
+    elif workers > 1:
+        with ThreadPoolExecutor(max_workers=min(workers, len(cuts))) as pool:
+            list(pool.map(lambda cut, path: _decodeAudio(video, cut[0], cut[1], fps, nchannels, [path]),
+                          cuts, paths))
+    else:
+        start = cuts[0][0]
+        segmentTimes = ",".join("%.3f" % (b - start) for a, b in cuts[:-1])
+        _decodeAudio(video, start, cuts[-1][1], fps, nchannels,
+                     ["-f", "segment", "-segment_times", segmentTimes, "-segment_start_number", "1",
+                      "-reset_timestamps", "1", pattern])
+    return paths
+
+
+# Rewrites a WAV file in place as 16 bit mono at `rate` Hz: channels are
+# averaged and the signal is resampled with a polyphase filter.  Speech
+# recognition does not need more, and it is ~5x less data than 44.1 kHz stereo.
+def downmixResample(path, rate=16000):
+    from scipy.io import wavfile
+    from scipy.signal import resample_poly
+
+    fps, x = wavfile.read(path)
+    if x.ndim == 2:
+        x = x.mean(axis=1)
+    x = np.asarray(x, dtype=np.float32)
+    if fps != rate:
+        g = math.gcd(int(fps), int(rate))
+        x = resample_poly(x, rate // g, int(fps) // g)
+    wavfile.write(path, rate, np.clip(np.round(x), -32768, 32767).astype(np.int16))
+    return path
+
+
+# RMS loudness of the audio track in frames of `frame` seconds, decoded as
+# 8 kHz mono and reduced block by block so memory stays small for long videos
+def audioEnvelope(video, rate=8000, frame=0.05, start=None, length=None):
+    hop = int(rate * frame)
+    cmd = [FFMPEG, "-loglevel", "error"]
+    if start is not None:
+        cmd += ["-ss", "%.3f" % start, "-t", "%.3f" % length]
+    cmd += ["-i", video, "-vn", "-map", "0:a:0",
+            "-f", "s16le", "-acodec", "pcm_s16le", "-ar", str(rate), "-ac", "1", "-"]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE)
+    blockSize = hop * 4096 * 2
+    rms = []
+    rest = b""
+    while True:
+        data = proc.stdout.read(blockSize)
+        if not data:
+            break
+        data = rest + data
+        usable = len(data) - len(data) % (hop * 2)
+        rest = data[usable:]
+        x = np.frombuffer(data[:usable], dtype=np.int16).astype(np.float32).reshape(-1, hop)
+        rms.append(np.sqrt(np.mean(x * x, axis=1)))
+    proc.stdout.close()
+    if proc.wait() != 0:
+        raise subprocess.CalledProcessError(proc.returncode, cmd)
+    return (np.concatenate(rms) if rms else np.zeros(0, dtype=np.float32)), frame
+
+
+# audioEnvelope of the whole video computed by `workers` ffmpeg processes, each
+# one decoding a whole number of frames of the audio for a thread that reduces
+# them (NumPy releases the GIL while it does)
+def parallelEnvelope(video, duration, workers, rate=8000, frame=0.05):
+    if workers <= 1:
+        return audioEnvelope(video, rate, frame)
+    frames = int(math.ceil(duration / frame))
+    per = int(math.ceil(frames / float(workers)))
+    starts = [i * frame for i in range(0, frames, per)]
+    with ThreadPoolExecutor(max_workers=len(starts)) as pool:
+        parts = list(pool.map(lambda start: audioEnvelope(video, rate, frame, start, per * frame)[0], starts))
+    return np.concatenate(parts), frame
+
+
+# Splits [0, duration] into `parts` segments (more if a segment would be longer
+# than maxSegment seconds).  Every cut is moved to the quietest point within
+# `search` seconds of its nominal position so no word is cut in half.
+def segmentCuts(video, duration, parts, maxSegment=None, search=5.0, pause=0.3, workers=1):
+    if maxSegment:
+        parts = max(parts, int(math.ceil(duration / float(maxSegment))))
+    if parts <= 1:
+        return [(0, duration)]
+
+    rms, frame = parallelEnvelope(video, duration, workers)
+    # a pause, not just one quiet frame
+    width = max(1, int(pause / frame))
+    smooth = np.convolve(rms, np.ones(width) / width, mode="same")
+    search = min(search, duration / parts / 2.0)
+
+    points = [0]
+    for i in range(1, parts):
+        nominal = duration * i / parts
+        lo = max(int((nominal - search) / frame), 0)
+        hi = min(int((nominal + search) / frame) + 1, len(smooth))
+        if hi > lo:
+            points.append((lo + int(np.argmin(smooth[lo:hi]))) * frame + frame / 2)
+        else:
+            points.append(nominal)
+    points.append(duration)
+    return list(zip(points[:-1], points[1:]))
+
+
+# ffprobe next to the ffmpeg binary or on the PATH, None if there is none
+# (moviepy only guarantees ffmpeg)
+def _ffprobe():
+    import shutil
+
+    return shutil.which(os.path.join(os.path.dirname(FFMPEG), "ffprobe")) or shutil.which("ffprobe")
+
+
+# codecs of the first video and audio stream: {"video": codec, "profile": ...,
+# "tbn": integer timescale of the video or None, "audio": codec or None}
+def streamInfo(video):
+    ffprobe = _ffprobe()
+    if ffprobe is not None:
+        return _probeStreams(ffprobe, video)
+    return _bannerStreams(video)
+
+
+def _probeStreams(ffprobe, video):
+    import json
+
+    output = subprocess.check_output([ffprobe, "-v", "error", "-show_entries",
+                                      "stream=codec_type,codec_name,profile,time_base", "-of", "json", video])
+    info = {"video": None, "profile": None, "tbn": None, "audio": None}
+    for stream in json.loads(output.decode("utf-8")).get("streams", []):
+        if stream.get("codec_type") == "video" and info["video"] is None:
+            info["video"], info["profile"] = stream.get("codec_name"), stream.get("profile")
+            num, _, den = stream.get("time_base", "").partition("/")
+            if num == "1" and den.isdigit():
+                info["tbn"] = int(den)
+        elif stream.get("codec_type") == "audio" and info["audio"] is None:
+            info["audio"] = stream.get("codec_name")
+    return info
+
+
+# the same from the stream lines ffmpeg prints for an input
+def _bannerStreams(video):
+    proc = subprocess.run([FFMPEG, "-hide_banner", "-i", video], stderr=subprocess.PIPE, universal_newlines=True)
+    info = {"video": None, "profile": None, "tbn": None, "audio": None}
+    match = re.search(r"Stream #0:\d+.*?: Video: (\w+)(?: \(([^)]*)\))?", proc.stderr)
+    if match:
+        info["video"], info["profile"] = match.group(1), match.group(2)
+    # ffmpeg writes timescales that are multiples of 1000 as e.g. "30k tbn"
+    match = re.search(r"Stream #0:\d+.*?: Video: .*?(\d+(?:\.\d+)?)(k?) tbn", proc.stderr)
+    if match:
+        tbn = float(match.group(1)) * (1000 if match.group(2) else 1)
+        if tbn == int(tbn):
+            info["tbn"] = int(tbn)
+    match = re.search(r"Stream #0:\d+.*?: Audio: (\w+)", proc.stderr)
+    if match:
+        info["audio"] = match.group(1)
+    return info
+
+
+# presentation times of the video keyframes; only keyframes are decoded
+def keyframes(video):
+    proc = subprocess.run([FFMPEG, "-hide_banner", "-nostats", "-skip_frame", "nokey", "-i", video,
+                           "-map", "0:v:0", "-vf", "showinfo", "-f", "null", "-"],
+                          stderr=subprocess.PIPE, universal_newlines=True)
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, proc.args, stderr=proc.stderr)
+    return sorted(float(t) for t in re.findall(r"pts_time:(-?[\d.]+)", proc.stderr))
+
+
+# libx264 settings that produce a stream the concat demuxer can join to the
+# stream copied parts of the source
+def _encoder(info):
+    args = ["-c:v", "libx264", "-preset", "veryfast", "-crf", "18"]
+    profile = (info["profile"] or "").lower()
+    profile = {"constrained baseline": "baseline", "high 10": "high10", "high 4:2:2": "high422",
+               "high 4:4:4 predictive": "high444"}.get(profile, profile)
+    if info["video"] == "h264" and profile in ("baseline", "main", "high", "high10", "high422", "high444"):
+        args += ["-profile:v", profile]
+    if info["tbn"]:
+        args += ["-video_track_timescale", str(info["tbn"])]
+    return args + ["-c:a", "aac"]
+
+
+def _cutPiece(video, start, end, output, codec):
+    subprocess.check_call([FFMPEG, "-y", "-loglevel", "error", "-ss", "%.3f" % start, "-i", video,
+                           "-t", "%.3f" % (end - start), "-map", "0:v:0", "-map", "0:a:0?"] + codec +
+                          ["-avoid_negative_ts", "make_zero", output])
+    return output
+
+
+# (start, end, stream copy) pieces of a range: the whole GOPs inside it are
+# copied, only the partial GOPs at its edges are encoded
+def _pieces(start, end, keys, minCopy=1.0):
+    inner = [k for k in keys if start <= k <= end]
+    if len(inner) < 2 or inner[-1] - inner[0] < minCopy:
+        return [(start, end, False)]
+    pieces = []
+    if inner[0] - start > 0.01:
+        pieces.append((start, inner[0], False))
+    pieces.append((inner[0], inner[-1], True))
+    if end - inner[-1] > 0.01:
+        pieces.append((inner[-1], end, False))
+    return pieces
+
+
+# (stream info, keyframe times or None) of a video about to be cut; keyframes
+# are only needed when the source can be stream copied
+def _renderPlan(video):
+    info = streamInfo(video)
+    if info["video"] == "h264" and info["audio"] in ("aac", None):
+        return info, keyframes(video)
+    return info, None
+
+
+# cuts the pieces of the (start, end) ranges (through pool.map if given) and
+# joins them into output with the concat demuxer
+def _joinRanges(video, cuts, output, workdir, plan, pool=None):
+    info, keys = plan
+    encode = _encoder(info)
+    copy = ["-c", "copy"]
+    if keys is not None:
+        pieces = [piece for start, end in cuts for piece in _pieces(start, end, keys)]
+    else:
+        pieces = [(start, end, False) for start, end in cuts]
+
+    name = os.path.splitext(os.path.basename(output))[0]
+    paths = [os.path.join(workdir, "%s_piece%04d.mp4" % (name, i)) for i in range(len(pieces))]
+    jobs = [(video, start, end, path, copy if stream else encode) for (start, end, stream), path in zip(pieces, paths)]
+    list((pool.map if pool is not None else map)(lambda args: _cutPiece(*args), jobs))
+
+    listPath = os.path.join(workdir, "%s_pieces.txt" % name)
+    with open(listPath, "w", encoding="utf-8") as fo:
+        for path in paths:
+            fo.write("file '%s'\n" % os.path.abspath(path).replace("'", "'\\''"))
+    subprocess.check_call([FFMPEG, "-y", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", listPath,
+                           "-map", "0:v:0", "-map", "0:a:0?", "-c", "copy", "-movflags", "+faststart", output])
+    for path in paths:
+        os.remove(path)
+    os.remove(listPath)
+    return output
+
+
+# Writes the (start, end) ranges of video, in order, to one compressed MP4.
+# H.264 sources are cut at keyframes with stream copy and only the partial
+# GOPs at the edges of each range are re-encoded (with the same profile, so
+# the parts can be joined); other codecs are re-encoded to H.264/AAC.  The
+# parts are joined by the ffmpeg concat demuxer without another encode.
+def renderCuts(video, cuts, output, workdir, workers=1):
+    if not cuts:
+        raise ValueError("no ranges to render from %s" % video)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        return _joinRanges(video, cuts, output, workdir, _renderPlan(video), pool)
+
+
+# consecutive ranges grouped until a group lasts at least `length` seconds;
+# the first group is kept to the first range so playback can start early
+def groupCuts(cuts, length=10.0):
+    groups = []
+    duration = 0.0
+    for start, end in cuts:
+        if len(groups) < 2 or duration >= length:
+            groups.append([])
+            duration = 0.0
+        groups[-1].append((start, end))
+        duration += end - start
+    return groups
+
+
+# Renders every group of ranges to its own MP4 (pattern % 1, 2, ...), groups
+# in parallel, and calls done(index, path) for each in timeline order as soon
+# as it and all groups before it are written.  Returns the paths.
+def renderSegments(video, groups, pattern, workdir, workers=1, done=None):
+    if not groups:
+        raise ValueError("no ranges to render from %s" % video)
+    plan = _renderPlan(video)
+    paths = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [pool.submit(_joinRanges, video, group, pattern % (i + 1), workdir, plan)
+                   for i, group in enumerate(groups)]
+        for i, future in enumerate(futures):
+            paths.append(future.result())
+            if done is not None:
+                done(i, paths[-1])
+    return paths
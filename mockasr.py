@@ -0,0 +1,118 @@
+# Local stand-in for the DeepAffects ASR api.  Accepts the same JSON request
+# ({"content": base64 audio, "encoding", "sampleRate", ...}) and answers at once
+# with {"response": {"transcript", "words"}}, generated from a hash of the audio,
+# so the same segment always gets the same transcript and benchmarks need no
+# network or api quota.
+#
+#     python mockasr.py --port 8765
+import io
+import sys
+import json
+import time
+import wave
+import base64
+import random
+import hashlib
+import argparse
+from threading import Thread
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from socketserver import ThreadingMixIn
+
+VOCABULARY = ("the data security network system information model process user "
+              "key attack memory performance chip apple mac power design efficiency "
+              "learning video lecture algorithm speed important new first we our "
+              "can is are this that with for from into over more most very").split()
+
+
+def audioDuration(audio, encoding, sampleRate):
+    if encoding == "WAV":
+        wf = wave.open(io.BytesIO(audio), "rb")
+        return wf.getnframes() / float(wf.getframerate())
+    if encoding == "FLAC" and audio[:4] == b"fLaC":
+        # STREAMINFO: 20 bit sample rate ... 36 bit total samples
+        info = int.from_bytes(audio[18:26], "big")
+        rate = info >> 44
+        total = info & ((1 << 36) - 1)
+        if rate:
+            return total / float(rate)
+    return len(audio) / (2.0 * sampleRate)
+
+
+def fakeTranscript(audio, duration):
+    rng = random.Random(hashlib.sha1(audio).hexdigest())
+    words = []
+    t = 0.2
+    sentence = 0
+    length = rng.randint(6, 18)
+    while True:
+        end = t + rng.uniform(0.2, 0.6)
+        if end > duration:
+            break
+        word = rng.choice(VOCABULARY)
+        sentence += 1
+        if sentence == length:
+            word += "."
+            sentence = 0
+            length = rng.randint(6, 18)
+        words.append({"word": word, "start": round(t, 2), "end": round(end, 2)})
+        t = end + rng.uniform(0.05, 0.3)
+    if words and not words[-1]["word"].endswith("."):
+        words[-1]["word"] += "."
+    return {"response": {"transcript": " ".join(w["word"] for w in words), "words": words}}
+
+
+class Handler(BaseHTTPRequestHandler):
+    latency = 0.0
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = json.loads(self.rfile.read(length))
+            audio = base64.b64decode(request["content"])
+            duration = audioDuration(audio, request.get("encoding", "WAV"), request.get("sampleRate", 16000))
+        except (ValueError, KeyError, wave.Error) as e:
+            self.send_error(400, str(e))
+            return
+        if self.latency:
+            time.sleep(self.latency)
+        body = json.dumps(fakeTranscript(audio, duration)).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+# runs the server in a daemon thread, returns (server, url); port 0 picks a free one
+def start(port=0, latency=0.0):
+    handler = type("Handler", (Handler,), {"latency": latency})
+    server = Server(("127.0.0.1", port), handler)
+    Thread(target=server.serve_forever, daemon=True).start()
+    return server, "http://127.0.0.1:%d/asr" % server.server_address[1]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Deterministic local mock of the DeepAffects ASR api.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds to wait before every answer")
+    args = parser.parse_args(argv)
+
+    handler = type("Handler", (Handler,), {"latency": args.latency})
+    server = Server(("127.0.0.1", args.port), handler)
+    print("mock ASR listening on http://127.0.0.1:%d/asr" % args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
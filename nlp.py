@@ -0,0 +1,540 @@
+import os
+import re
+import copy
+import string
+import functools
+from collections import namedtuple
+import numpy as np
+import keyphrases
+import resources
+import transcripts
+
+_punctuation = str.maketrans("", "", string.punctuation)
+
+
+# lowercase stopwords of the given nltk languages (all of them when None, like
+# stopwords.words()), loaded once per process
+@functools.lru_cache(maxsize=None)
+def stopwordSet(languages=None):
+    resources.ensure(("stopwords",))
+    from nltk.corpus import stopwords
+
+    if languages is None:
+        return frozenset(w.lower() for w in stopwords.words())
+    return frozenset(w.lower() for language in languages for w in stopwords.words(language))
+
+
+# the first limit words of text without punctuation and stopwords
+def contentTokens(text, limit=None, languages=None):
+    stop = stopwordSet(tuple(languages) if languages else None)
+    cleansed = " ".join(text.split()[:limit]).translate(_punctuation).split()
+    return [word for word in cleansed if word.lower() not in stop]
+
+
+# wikipedia expansion of topic: the words of its summary and of the linked
+# phrases found in it, then for every further layer (depth 2 is the original
+# two layer search) the phrases linked from those pages.  Pages and finished
+# expansions come from the keyphrase store when it has them.
+def superImportant(topic, store=None, depth=2):
+    if store is None:
+        store = keyphrases.defaultStore()
+    key = "%s@%d" % (topic, depth)
+    cached = store.expansion(key)
+    if cached is not None:
+        return cached
+
+    content, links = store.page(topic)
+
+    hyperLinks1 = []
+    nonhyperLinks = content.split()
+    for words2 in links:
+        if words2 in content:
+            hyperLinks1.append(words2)
+
+    contentWords = list(set(copy.deepcopy(hyperLinks1) + nonhyperLinks))
+
+    fails = 0
+    seen = set([topic])
+    layer = hyperLinks1
+    for level in range(2, depth + 1):
+        layer = [words for words in layer if words not in seen]
+        seen.update(layer)
+        pages = store.pages(layer)
+        nextLayer = []
+        for words in layer:
+            if isinstance(pages[words], Exception):
+                fails += 1
+                continue
+            content, links = pages[words]
+            count = 0
+            for words2 in links:
+                if words2 in content:
+                    contentWords.append(words2)
+                    nextLayer.append(words2)
+                    count += 1
+                if count >= 1 * len(hyperLinks1):
+                    break
+        layer = nextLayer
+
+    print("Wikipedia pages: %(stored)d from store, %(fetched)d fetched, %(retried)d retried, %(failed)d failed"
+          % store.stats)
+    contentWords = set((" ".join(contentWords)).split())
+    store.putExpansion(key, contentWords)
+    return contentWords
+
+
+# The seed topics of a transcript: its 1-3 word phrases ranked by summed
+# TF-IDF over the lines, kept when they resolve to a Wikipedia page (the local
+# keyphrase store first, then the network unless the store is offline); the
+# candidates are resolved together and phrases of the same page count once.
+# Only the chosen topics' pages are fetched, by superImportant.  languages
+# select the stopwords.
+def detectTopics(lineWiseText, count=3, store=None, candidates=30, languages=None):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    if store is None:
+        store = keyphrases.defaultStore()
+    pattern = r"(?u)\b[a-zA-Z][a-zA-Z]+\b"
+    # only stopwords the pattern can produce, sklearn warns about the others
+    stop = [word for word in stopwordSet(tuple(languages) if languages else None) if re.fullmatch(pattern, word)]
+    vectorizer = TfidfVectorizer(ngram_range=(1, 3), stop_words=stop, token_pattern=pattern)
+    try:
+        scores = np.asarray(vectorizer.fit_transform(lineWiseText).sum(axis=0)).ravel()
+    except ValueError:
+        # nothing but stopwords
+        return []
+    terms = sorted(vectorizer.vocabulary_, key=vectorizer.vocabulary_.get)
+    phrases = [terms[ind] for ind in np.argsort(scores)[::-1][:candidates]]
+    titles = store.resolveAll(phrases)
+    topics = []
+    for phrase in phrases:
+        title = titles[phrase]
+        if title is not None and title not in topics:
+            topics.append(title)
+            if len(topics) >= count:
+                break
+    print("Detected topics: ", topics)
+    return topics
+
+
+def changePriorities(dic, mapWords):
+    frequencies = []
+    for k, v in dic.items():
+        frequencies.append(v)
+    X = copy.deepcopy(np.percentile(np.array(frequencies), 95))
+
+    misMatches = 0
+    for words in mapWords:
+        if words in dic.keys():
+            dic[words] = X
+        elif words.lower() in dic.keys():
+            dic[words.lower()] = X
+        else:
+            misMatches += 1
+
+    return dic, misMatches
+
+
+def chunk(sourceFile, wordsPerLine=None, endLineAt=None):
+    fi = open(sourceFile, "r+")
+    text = fi.read()
+    text = text.replace("\n", "")
+
+    if wordsPerLine != None:
+        text = text.split()
+        for words in range(1, len(text) + 1):
+            if words % 3 == 0:
+                text[words - 1] = text[words - 1] + "\n"
+        fi.seek(0)
+        fi.write(" ".join(text))
+    if endLineAt != None:
+
+        for words in endLineAt:
+            text = text.split(words)
+            text = "\n".join(text)
+
+        fi.seek(0)
+        fi.write(text)
+
+    fi.close()
+    return
+
+
+# column index -> word array of a fitted vectorizer's vocabulary
+def vocabularyTerms(vectorizer):
+    vocabulary = vectorizer.vocabulary_
+    terms = np.empty(len(vocabulary), dtype=object)
+    terms[list(vocabulary.values())] = list(vocabulary.keys())
+    return terms
+
+
+# topics are the wikipedia seeds for keyword expansion, detected from the
+# transcript (seedCount of them) when not given; languages select the stopwords
+def completeFiltering(singleStringTxt, multiLineTxt, limitOnFreq, limitOnDataW=10000, topics=None, seedCount=3,
+                      depth=2, languages=None):
+    cleansed = contentTokens(singleStringTxt, limitOnDataW, languages)
+
+    cleansedTxt = " ".join(cleansed)
+
+    wholeText = [cleansedTxt]
+    lineWiseText = multiLineTxt
+
+    from sklearn.feature_extraction.text import CountVectorizer
+
+    # list of text documents
+    # create the transform
+    vectorizer1 = CountVectorizer()
+    vectorizer2 = CountVectorizer()
+    # tokenize, build vocab and encode in one pass; the counts stay sparse,
+    # only nonzero ones are visited, so limitOnFreq is expected to be at least 1
+    vector1 = vectorizer1.fit_transform(wholeText)
+    vector2 = vectorizer2.fit_transform(lineWiseText).tocsr()
+    vector2.sort_indices()
+    terms1 = vocabularyTerms(vectorizer1)
+    terms2 = vocabularyTerms(vectorizer2)
+
+    finalCount = np.asarray(vector1.sum(axis=0)).ravel()
+
+    countDict2 = dict()
+    priorities2 = dict()
+    frequent = np.flatnonzero(finalCount >= limitOnFreq)
+    countDict1 = dict(zip(terms1[frequent], finalCount[frequent]))
+
+    for lines in range(vector2.shape[0]):
+        start, end = vector2.indptr[lines], vector2.indptr[lines + 1]
+        counts = vector2.data[start:end]
+        keep = counts >= limitOnFreq
+        countDict = dict(zip(terms2[vector2.indices[start:end][keep]], counts[keep]))
+
+        priorities = sorted(countDict, key=countDict.get, reverse=True)
+
+        countDict2[str(lines + 1)] = countDict
+        priorities2[str(lines + 1)] = priorities
+
+    if topics is None:
+        topics = detectTopics(lineWiseText, seedCount, languages=languages)
+    contentWords = set()
+    for topic in topics:
+        try:
+            contentWords |= superImportant(topic, depth=depth)
+        except Exception as e:
+            print("No expansion for topic %s: %s" % (topic, e))
+    countDict1, misMatch = changePriorities(countDict1, contentWords)
+    print("These many got mismatched in WIKEPIDA NEURAL NETWORK: ", misMatch)
+
+    priorities1 = sorted(countDict1, key=countDict1.get, reverse=True)
+
+    return priorities1, priorities2, countDict1, countDict2
+
+
+def extractInclude(wholeLines, priorities, prioritiesMap, prioritiesMapext, method, limitOnDataL, maintain):
+    from fuzzywuzzy import process
+
+    include = np.zeros((limitOnDataL, len(priorities)))
+    if method == "TF-IDF":
+        includeTFIDF = np.zeros((limitOnDataL, len(priorities)))
+
+    # keyed by line index, so repeated lines keep their own position
+    choices = dict(enumerate(wholeLines))
+    for ind, words in enumerate(priorities):
+        options = process.extract(words, choices, limit=limitOnDataL)
+        for line, score, lineInd in options:
+
+            if (words in line.split()) and method == "Frequency":
+                maintain[str(lineInd + 1)].append(words)
+                include[lineInd][ind] = score * prioritiesMap[words]
+            elif (words in line.split()) and method == "TF-IDF":
+                maintain[str(lineInd + 1)].append(words)
+                includeTFIDF[lineInd][ind] = prioritiesMapext[str(lineInd + 1)][words] * prioritiesMap[words]
+    if method == "TF-IDF":
+
+        includeTFIDF = list(np.sum(includeTFIDF, axis=0))
+
+        for ind, words in enumerate(priorities):
+            options = process.extract(words, choices, limit=limitOnDataL)
+            for line, score, lineInd in options:
+
+                if (words in line.split()):
+                    include[lineInd][ind] = score * includeTFIDF[ind]
+    return include
+
+
+# token -> indices of the lines whose split() contains it
+def lineIndex(wholeLines):
+    index = dict()
+    for ind, line in enumerate(wholeLines):
+        for token in set(line.split()):
+            index.setdefault(token, []).append(ind)
+    return index
+
+
+# a string cleaned the way process.extract cleans query and choices before
+# WRatio: its default processor, then again forced to ascii
+def fuzzyProcess(text):
+    from fuzzywuzzy import utils
+
+    return utils.full_process(utils.full_process(text), force_ascii=True)
+
+
+# WRatio of words against each of the fuzzyProcess'ed lines, exactly the
+# scores process.extract gives them
+def fuzzyScores(words, processedLines):
+    from fuzzywuzzy import fuzz
+
+    query = fuzzyProcess(words)
+    return np.array([fuzz.WRatio(query, line, full_process=False) for line in processedLines], dtype=float)
+
+
+# the include matrix of fuzzyWayCondense without matching every keyword
+# against every line: process.extract hits only count when the keyword is a
+# token of the line, so only those lines are looked up and scored
+def indexedInclude(wholeLines, priorities, prioritiesMap, prioritiesMapext, method, limitOnDataL, maintain):
+    include = np.zeros((limitOnDataL, len(priorities)))
+    includeTFIDF = np.zeros((limitOnDataL, len(priorities)))
+    index = lineIndex(wholeLines)
+    processed = dict()
+    hits = []
+    for ind, words in enumerate(priorities):
+        lines = index.get(words)
+        if not lines:
+            continue
+        for line in lines:
+            if line not in processed:
+                processed[line] = fuzzyProcess(wholeLines[line])
+        scores = fuzzyScores(words, [processed[line] for line in lines])
+        for line in lines:
+            maintain[str(line + 1)].append(words)
+        if method == "Frequency":
+            include[lines, ind] = scores * prioritiesMap[words]
+        else:
+            includeTFIDF[lines, ind] = [prioritiesMapext[str(line + 1)][words] * prioritiesMap[words]
+                                        for line in lines]
+            hits.append((ind, lines, scores))
+    if method == "TF-IDF":
+        includeTFIDF = np.sum(includeTFIDF, axis=0)
+        for ind, lines, scores in hits:
+            include[lines, ind] = scores * includeTFIDF[ind]
+    return include
+
+
+# engine "indexed" scores the lines through lineIndex/indexedInclude,
+# "fuzzywuzzy" with the original process.extract of every keyword
+def fuzzyWayCondense(fileSource, priorities1, priorities2, prioritiesMap1, prioritiesMap2, limitOnLines=3,
+                     limitOnDataL=100, method="Frequency", printLineScores=False, engine="indexed"):
+    if method == "Frequency":
+        priorities = priorities1
+        prioritiesMap = prioritiesMap1
+        prioritiesMapext = None
+    elif method == "TF-IDF":
+        priorities = priorities1
+        prioritiesMap = prioritiesMap1
+        prioritiesMapext = prioritiesMap2
+    fi = open(fileSource, "r")
+
+    wholeLines = fi.readlines()[:limitOnDataL]
+    maintain = dict()
+
+    for lines in range(1, limitOnDataL + 1):
+        maintain[str(lines)] = []
+
+    fi.close()
+
+    if engine == "indexed":
+        include = indexedInclude(wholeLines, priorities, prioritiesMap, prioritiesMapext, method, limitOnDataL,
+                                 maintain)
+    else:
+        include = extractInclude(wholeLines, priorities, prioritiesMap, prioritiesMapext, method, limitOnDataL,
+                                 maintain)
+
+    for lines in range(1, limitOnDataL + 1):
+        maintain[str(lines)] = set(maintain[str(lines)])
+
+    include = np.sum(include, axis=1)
+    includeTemp = include.copy()
+
+    if printLineScores == True:
+        print("\nThe Scores of the Sentences from 1 to", limitOnDataL, " are as follows \n", include)
+        print("\nThe Key Words Per Line for all the lines are : \n", maintain)
+
+    condensedLines = []
+    condensedLinesIndices = []
+    if limitOnLines != "NormSTDPick":
+        # highest scores first, ties in line order
+        for i in np.argsort(-include, kind="stable")[:limitOnLines]:
+            condensedLines.append(wholeLines[i])
+            condensedLinesIndices.append(i + 1)
+    else:
+        includeTemp = np.flatnonzero(includeTemp >= np.percentile(includeTemp, 50)) + 1
+        condensedLines = [wholeLines[i - 1] for i in includeTemp]
+        condensedLinesIndices = includeTemp
+
+    condensedText = " ".join(condensedLines)
+
+    return condensedText, condensedLines, condensedLinesIndices
+
+
+# a line of the chunked transcript: its 0-based index, its first word's
+# position in the transcript's word timeline, its word count, and the start of
+# its first and end of its last word (None when the words run out)
+Sentence = namedtuple("Sentence", "index text offset words start end")
+
+
+# timeline is a transcripts.Transcript
+def sentenceRecords(lines, timeline):
+    sentences = []
+    offset = 0
+    for index, text in enumerate(lines):
+        count = len(text.split())
+        start = end = None
+        if count and offset + count <= len(timeline):
+            start = float(timeline.start[offset])
+            end = float(timeline.end[offset + count - 1])
+        sentences.append(Sentence(index, text, offset, count, start, end))
+        offset += count
+    return sentences
+
+
+# Coalesces time ordered (start, end) ranges: ranges overlapping or less
+# than gap seconds apart become one, and ranges still shorter than minLength
+# are widened around their middle (then merged again if they now touch), so
+# the render seeks once per merged range instead of once per sentence
+def mergeStamps(stamps, gap=0.5, minLength=0.0):
+    merged = []
+    for start, end in stamps:
+        if merged and start - merged[-1][1] <= gap:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    if minLength > 0:
+        widened = []
+        for start, end in merged:
+            if end - start < minLength:
+                middle = (start + end) / 2.0
+                start, end = max(0.0, middle - minLength / 2.0), middle + minLength / 2.0
+            if widened and start <= widened[-1][1]:
+                widened[-1][1] = max(widened[-1][1], end)
+            else:
+                widened.append([start, end])
+        merged = widened
+    return [(start, end) for start, end in merged]
+
+
+# the subtitles of the kept sentences per merged range, each dict keyed by
+# the (start, end) of the sentence within its range
+def rangeCues(sentences, merged):
+    cues = []
+    ind = 0
+    for start, end in merged:
+        cues.append(dict())
+        while ind < len(sentences) and sentences[ind].start < end:
+            sentence = sentences[ind]
+            cues[-1][(max(sentence.start, start) - start, min(sentence.end, end) - start)] = sentence.text
+            ind += 1
+    return cues
+
+
+# rangeCues laid out on the timeline of the merged ranges played back to back,
+# starting at `position`
+def placeCues(cues, merged, position=0.0):
+    ddd = dict()
+    for (start, end), rangeCue in zip(merged, cues):
+        for (a, b), text in rangeCue.items():
+            ddd[(position + a, position + b)] = text
+        position += end - start
+    return ddd
+
+
+# the subtitles of the kept sentences keyed by their (start, end) in the video
+# made of the merged ranges played back to back
+def summaryTimeline(sentences, merged):
+    return placeCues(rangeCues(sentences, merged), merged)
+
+
+# the rangeCues of the merged ranges split per group of ranges
+# (media.groupCuts), each keyed by its time within its group's own video;
+# a cue belongs to its range, so boundaries never depend on float sums
+def splitTimeline(cues, groups):
+    parts = []
+    ind = 0
+    for group in groups:
+        parts.append(placeCues(cues[ind:ind + len(group)], group))
+        ind += len(group)
+    return parts
+
+
+def convert(seconds):
+    seconds = seconds % (24 * 3600)
+    hour = seconds // 3600
+    seconds %= 3600
+    minutes = seconds // 60
+    seconds %= 60
+
+    return "%d:%02d:%02d" % (hour, minutes, seconds)
+
+
+# merges the per segment transcripts, picks the important lines and maps them
+# back to (start, end) ranges of the source video.  Returns the ranges to keep,
+# the subtitles keyed by their (start, end) in the summary video and the
+# subtitles of every range (rangeCues).
+# offsets are the start times of the segments in the source video, without
+# them the end of the previous segment's last word is used
+# gap and minLength are the mergeStamps tolerances for the kept ranges
+def summarize(transcriptPaths, workdir=".", offsets=None, topics=None, seedCount=3, depth=2, languages=None,
+              gap=0.5, minLength=0.0):
+    print("NLP STARTED")
+    resources.ensure()
+
+    Tpath = os.path.join(workdir, "1.txt")  # "/content/drive/My Drive/entireTranscript.txt"
+
+    parts = [transcripts.load(Tnpath) for Tnpath in transcriptPaths]
+    timeline = transcripts.merge(parts, offsets)
+
+    tpt = open(Tpath, "w")
+    tpt.write(timeline.text)
+    tpt.close()
+
+    path = Tpath
+
+    chunk(path, endLineAt=[".", "?"])
+
+    fi = open(path, "r")
+    wholeText = fi.read()
+    fi.seek(0)
+    totalWords = len((fi.read()).split())
+    fi.seek(0)
+    totalLines = len(fi.readlines())
+    fi.seek(0)
+    lineWiseText = fi.readlines()
+    fi.close()
+
+    # "completeFiltering" returns priorities1,2 and countDict1,2 which are only used by "fuzzyWayCondense"
+    priorities1, priorities2, countDict1, countDict2 = completeFiltering(wholeText, lineWiseText, limitOnFreq=1,
+                                                                         limitOnDataW=totalWords, topics=topics,
+                                                                         seedCount=seedCount, depth=depth,
+                                                                         languages=languages)
+
+    # "limitOnLines" can be anything <= "totalLines", "limitOnDataL" equals "totalLines"
+    condensedText, condensedLines, condensedLinesIndices1 = fuzzyWayCondense(path, priorities1, priorities2,
+                                                                             countDict1,
+                                                                             countDict2,
+                                                                             limitOnLines="NormSTDPick",
+                                                                             limitOnDataL=totalLines,
+                                                                             method="TF-IDF",
+                                                                             printLineScores=False)
+
+    finalSet = set(condensedLinesIndices1)
+    print("\nConsider these lines as Important : ", finalSet)
+    print("\nPercentage of Condensation of initial Text is : {:.4f}%".format(
+        ((totalLines - len(finalSet)) / totalLines) * 100))
+
+    # the merged word timeline, kept next to the transcript text
+    timeline.save(os.path.join(workdir, "2.npz"))
+
+    sentences = sentenceRecords(lineWiseText, timeline)
+    # lines without words or past the end of the word timings are left out
+    kept = [sentences[line - 1] for line in sorted(finalSet) if sentences[line - 1].start is not None]
+    # USE "convert" if u need the output time stamps to be in HH:MM:SS
+    Stamps = mergeStamps([(sentence.start, sentence.end) for sentence in kept], gap, minLength)
+    cues = rangeCues(kept, Stamps)
+    ddd = placeCues(cues, Stamps)
+    return Stamps, ddd, cues
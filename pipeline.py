@@ -0,0 +1,457 @@
+# Headless summarization pipeline: split -> ASR upload -> collect transcripts
+# -> NLP -> render.  Used by the Player in testapp.py and from the command line:
+#
+#     python pipeline.py lecture.mp4 other.mp4 --jobs 2
+import os
+import sys
+import uuid
+import argparse
+from threading import Thread, Lock, Event
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, Future, wait
+
+STAGES = ("prepare", "transcribe", "collect", "summarize", "render")
+
+# all jobs share the same DeepAffects keys and webhook.site tokens, so only one
+# job at a time may be between upload and collecting its transcripts.  Other
+# backends (synchronous ones, DeepAffects with our own webhook receiver) do
+# not take this lock.
+_webhookLock = Lock()
+
+
+class Cancelled(Exception):
+    pass
+
+
+class Job(object):
+
+    def __init__(self, video, workdir=None, parts=4, maxSegment=None, reencode=False, readers=2, workers=None,
+                 audioFormat="wav", sampleRate=16000, languageCode="en-IN", asr=None, cache=None, topics=None,
+                 seedCount=3, depth=2, stopwordLanguages=None, renderMode="copy",
+                 mergeGap=0.5, minClip=0.0, segmentLength=10.0, onSegment=None, cancelled=None):
+        import media
+        import asr as asrBackends
+
+        self.video = os.path.abspath(video)
+        self.id = uuid.uuid4().hex[:12]
+        self.source = media.MediaSource(self.video, readers=readers)
+        if workdir is None:
+            workdir = os.path.dirname(self.video)
+        # one directory per video so parallel jobs never share clip/wav files
+        self.workdir = os.path.join(workdir, os.path.splitext(os.path.basename(self.video))[0] + "_parts")
+        # at least `parts` segments, more if one would be longer than maxSegment seconds
+        self.parts = parts
+        self.maxSegment = maxSegment
+        # old behaviour: write clipN.mp4 for every segment and take the audio from it
+        self.reencode = reencode
+        # "wav" or "flac", the format segments are uploaded in
+        self.audioFormat = audioFormat
+        # segments are uploaded as mono at this rate
+        self.sampleRate = sampleRate
+        self.languageCode = languageCode
+        # an asr.ASRBackend, shared between jobs
+        self.asr = asr or asrBackends.backend("deepaffects")
+        if not reencode and audioFormat not in getattr(self.asr, "formats", (audioFormat,)):
+            raise ValueError("the %s backend cannot read %s segments, use %s"
+                             % (self.asr.name, audioFormat, " or ".join(self.asr.formats)))
+        # a cache.TranscriptCache shared between jobs, or None
+        self.cache = cache
+        # wikipedia seed topics for the keyword expansion, detected from the
+        # transcript (seedCount of them) when None; depth is the number of link layers
+        self.topics = topics
+        self.seedCount = seedCount
+        self.depth = depth
+        # nltk stopword languages, all of them when None
+        self.stopwordLanguages = stopwordLanguages
+        # "copy": <video>_summary.mp4 cut with stream copy, "progressive": the
+        # same cut as summaryN.mp4 segments of about segmentLength seconds,
+        # listed in <video>_summary.m3u, "avi": the old uncompressed
+        # <video>.avi written through moviepy, "virtual": nothing is written,
+        # the output is the source to be played through its stamps
+        self.renderMode = renderMode
+        self.segmentLength = segmentLength
+        # progressive only: onSegment(path, subtitles) as soon as each segment
+        # is written, in playback order, subtitles keyed by time in the segment
+        self.onSegment = onSegment
+        self.summarySegments = []
+        # kept ranges less than mergeGap seconds apart are rendered as one,
+        # ranges shorter than minClip seconds are widened to it
+        self.mergeGap = mergeGap
+        self.minClip = minClip
+        self.videoKey = None
+        self.segmentKeys = []
+        # processes used to decode the audio, defaults to one per core
+        self.workers = workers or media.cpuWorkers()
+        self.cuts = []
+        self.segments = []
+        # per segment its transcript dict, or a Future of it from an asynchronous backend
+        self.pending = []
+        self.transcripts = []
+        self.stamps = []
+        self.subtitles = {}
+        # the subtitles of every kept range, in the range's own time (nlp.rangeCues)
+        self.cues = []
+        self.output = None
+        # a threading.Event; once set the job stops before its next stage or
+        # while waiting for transcripts, raising Cancelled
+        self.cancelled = cancelled
+
+    def checkCancelled(self):
+        if self.cancelled is not None and self.cancelled.is_set():
+            raise Cancelled("%s was cancelled" % self.video)
+
+    def path(self, name):
+        return os.path.join(self.workdir, name)
+
+
+def prepare(job):
+    import media
+
+    dur = media.segmentCuts(job.video, job.source.duration, job.parts, job.maxSegment, workers=job.workers)
+    job.cuts = dur
+
+    if not job.reencode:
+        job.segments = media.extractAudioSegments(job.video, dur, job.path("v%d." + job.audioFormat),
+                                                   fps=job.sampleRate, workers=job.workers)
+        return
+
+    def split(i):
+        x, y = dur[i]
+        with job.source.reader() as source:
+            clipN = source.subclip(x, y)
+            clipN.write_videofile(job.path("clip%d.mp4" % (i + 1)))
+            clipN.audio.write_audiofile(job.path("v%d.wav" % (i + 1)))
+        media.downmixResample(job.path("v%d.wav" % (i + 1)), job.sampleRate)
+
+    threads = [Thread(target=split, args=(i,)) for i in range(len(dur))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    job.segments = [job.path("v%d.wav" % (i + 1)) for i in range(len(dur))]
+
+
+# a video seen before with the same settings skips prepare, transcribe and
+# collect: its cuts and transcripts come from the cache
+def restore(job):
+    import webscrap
+
+    if job.cache is None:
+        return False
+    job.videoKey = job.cache.videoKey(job.video, parts=job.parts, maxSegment=job.maxSegment,
+                                      sampleRate=job.sampleRate, languageCode=job.languageCode,
+                                      backend=job.asr.name)
+    video = job.cache.getVideo(job.videoKey)
+    if video is None:
+        return False
+    print("TRANSCRIPTS FOUND IN CACHE")
+    job.cuts = [tuple(cut) for cut in video["cuts"]]
+    job.segmentKeys = video["segments"]
+    job.transcripts = [webscrap.save(i + 1, result, job.workdir) for i, result in enumerate(video["transcripts"])]
+    return True
+
+
+def transcribe(job):
+    if job.asr.slots is not None and len(job.segments) > job.asr.slots:
+        raise ValueError("%d segments but the %s backend takes at most %d"
+                         % (len(job.segments), job.asr.name, job.asr.slots))
+    print("API CALL STARTED")
+
+    def one(i):
+        key = None
+        if job.cache is not None:
+            key = job.cache.segmentKey(job.segments[i], job.asr.name, job.sampleRate, job.languageCode)
+            result = job.cache.get(key)
+            if result is not None:
+                return key, result
+        return key, job.asr.transcribe(job.segments[i], i, sampleRate=job.sampleRate,
+                                       languageCode=job.languageCode, key="%s/%d" % (job.id, i + 1))
+
+    with ThreadPoolExecutor(max_workers=len(job.segments)) as pool:
+        results = list(pool.map(one, range(len(job.segments))))
+    job.segmentKeys = [key for key, result in results]
+    job.pending = [result for key, result in results]
+
+
+# blocks (without using the CPU) until every pending transcript has arrived
+def collect(job):
+    import webscrap
+
+    print("WAITING FOR TRANSCRIPTS")
+    futures = [result for result in job.pending if isinstance(result, Future)]
+    # woken every second to see if the job was cancelled
+    while wait(futures, timeout=1.0).not_done:
+        try:
+            job.checkCancelled()
+        except Cancelled:
+            # stops the pollers and receivers still waiting
+            for future in futures:
+                future.cancel()
+            raise
+    results = [result.result() if isinstance(result, Future) else result for result in job.pending]
+    job.transcripts = [webscrap.save(i + 1, result, job.workdir) for i, result in enumerate(results)]
+    job.pending = []
+    if job.cache is not None:
+        for key, result in zip(job.segmentKeys, results):
+            job.cache.put(key, result)
+        job.cache.putVideo(job.videoKey, job.cuts, job.segmentKeys)
+
+
+def summarize(job):
+    import nlp
+
+    job.stamps, job.subtitles, job.cues = nlp.summarize(job.transcripts, job.workdir,
+                                              offsets=[a for a, b in job.cuts], topics=job.topics,
+                                              seedCount=job.seedCount, depth=job.depth,
+                                              languages=job.stopwordLanguages, gap=job.mergeGap,
+                                              minLength=job.minClip)
+    print(job.subtitles)
+
+
+def render(job):
+    import media
+
+    if job.renderMode == "virtual":
+        job.output = job.video
+        return
+    if job.renderMode == "avi":
+        renderAvi(job)
+    elif job.renderMode == "progressive":
+        renderProgressive(job)
+    else:
+        job.output = os.path.splitext(job.video)[0] + "_summary.mp4"
+        media.renderCuts(job.video, job.stamps, job.output, job.workdir, workers=job.workers)
+    print("FILE PROCESSING IS DONE")
+
+
+def renderProgressive(job):
+    import nlp
+    import media
+
+    groups = media.groupCuts(job.stamps, job.segmentLength)
+    subtitles = nlp.splitTimeline(job.cues, groups)
+
+    def done(i, path):
+        if job.onSegment is not None:
+            job.onSegment(path, subtitles[i])
+
+    job.summarySegments = media.renderSegments(job.video, groups, job.path("summary%d.mp4"), job.workdir,
+                                               workers=job.workers, done=done)
+    job.output = os.path.splitext(job.video)[0] + "_summary.m3u"
+    with open(job.output, "w", encoding="utf-8") as fo:
+        for path in job.summarySegments:
+            fo.write(os.path.relpath(path, os.path.dirname(job.output)) + "\n")
+
+
+def renderAvi(job):
+    from moviepy.editor import concatenate_videoclips
+
+    with job.source.reader() as clip:
+        V = []
+        for a, b in job.stamps:
+            V.append(clip.subclip(a, b))
+        # x concatinating both the clips
+        final = concatenate_videoclips(V)
+        job.output = os.path.splitext(job.video)[0] + ".avi"
+        final.write_videofile(job.output, codec='rawvideo')
+
+
+# runs every stage of one job, progress(video, stage, fraction) is called
+# before each stage and once more with stage "done"
+def run(job, progress=None):
+    if not isinstance(job, Job):
+        job = Job(job)
+    if not os.path.isdir(job.workdir):
+        os.makedirs(job.workdir)
+
+    def report(stage):
+        if stage in STAGES:
+            job.checkCancelled()
+        if progress is not None:
+            fraction = STAGES.index(stage) / len(STAGES) if stage in STAGES else 1.0
+            progress(job.video, stage, fraction)
+
+    try:
+        report("prepare")
+        if not restore(job):
+            prepare(job)
+            with _webhookLock if job.asr.exclusive else nullcontext():
+                report("transcribe")
+                transcribe(job)
+                report("collect")
+                collect(job)
+        report("summarize")
+        summarize(job)
+        report("render")
+        render(job)
+    finally:
+        job.source.close()
+    report("done")
+    return job
+
+
+class Pipeline(object):
+
+    # options are the Job defaults for every submitted video; with warm the
+    # NLP modules and corpora are loaded in the background while the first
+    # videos are still being extracted and transcribed
+    def __init__(self, jobs=2, warm=True, **options):
+        self.executor = ThreadPoolExecutor(max_workers=jobs)
+        self.options = options
+        # set by shutdown(cancel_futures=True) to stop the running jobs
+        self.cancelled = Event()
+        self.warming = None
+        if warm:
+            self.warming = Thread(target=warmUp, name="warm-up", daemon=True)
+            self.warming.start()
+
+    # returns a concurrent.futures.Future resolving to the finished Job
+    def submit(self, video, progress=None, **kwargs):
+        options = dict(self.options, **kwargs)
+        return self.executor.submit(run, Job(video, cancelled=self.cancelled, **options), progress)
+
+    # renders a finished (e.g. virtual) job's summary to <video>_summary.mp4,
+    # returns a Future of the job
+    def export(self, job, renderMode="copy"):
+        def export():
+            job.renderMode = renderMode
+            render(job)
+            return job
+
+        return self.executor.submit(export)
+
+    # with cancel_futures queued jobs never start and running ones stop at
+    # their next stage, so exiting does not wait for them to finish
+    def shutdown(self, wait=True, cancel_futures=False):
+        if cancel_futures:
+            self.cancelled.set()
+        self.executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+
+def warmUp():
+    import resources
+
+    try:
+        resources.warmUp()
+    except Exception as e:
+        # the summarize stage raises it again for the job
+        print("NLP warm-up failed: %s" % e)
+
+
+def printProgress(video, stage, fraction):
+    print("%3d%% %s: %s" % (fraction * 100, os.path.basename(video), stage))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize long videos without the player GUI.")
+    parser.add_argument("videos", nargs="+", help="input video files")
+    parser.add_argument("--jobs", type=int, default=2, help="videos processed at the same time")
+    parser.add_argument("--workdir", default=None,
+                        help="parent directory for the per video <name>_parts directories (default: next to the video)")
+    parser.add_argument("--parts", type=int, default=4, help="number of segments sent to the ASR api")
+    parser.add_argument("--max-segment", type=float, default=None,
+                        help="maximum segment length in seconds, adds segments for long videos")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processes used for audio extraction (default: one per core)")
+    parser.add_argument("--readers", type=int, default=2,
+                        help="decoder processes a job may keep open on its input video")
+    parser.add_argument("--sample-rate", type=int, default=16000,
+                        help="rate of the mono audio sent to the ASR api")
+    parser.add_argument("--flac", action="store_true",
+                        help="upload lossless FLAC instead of WAV segments")
+    parser.add_argument("--asr", default="deepaffects", choices=["deepaffects", "vosk", "mock"],
+                        help="speech recognition backend")
+    parser.add_argument("--language", default="en-IN", help="language code passed to the ASR")
+    parser.add_argument("--cache", default=None,
+                        help="transcript cache database (default: ~/.cache/video-summarizer/transcripts.sqlite)")
+    parser.add_argument("--cache-size", type=int, default=256, help="transcript cache size in MB")
+    parser.add_argument("--no-cache", action="store_true", help="always extract and transcribe again")
+    parser.add_argument("--keyphrases", default=None,
+                        help="Wikipedia keyphrase store (default: ~/.cache/video-summarizer/keyphrases.sqlite)")
+    parser.add_argument("--offline-wikipedia", action="store_true",
+                        help="expand keywords only from the keyphrase store, never from the network")
+    parser.add_argument("--topic", action="append", default=None, dest="topics",
+                        help="Wikipedia seed topic for keyword expansion, repeatable (default: detect from transcript)")
+    parser.add_argument("--seed-topics", type=int, default=3, help="number of topics to detect without --topic")
+    parser.add_argument("--expansion-depth", type=int, default=2, help="Wikipedia link layers to expand topics over")
+    parser.add_argument("--stopwords", action="append", default=None, metavar="LANGUAGE",
+                        help="nltk stopword language, repeatable (default: every language)")
+    parser.add_argument("--nltk-data", default=None,
+                        help="nltk data directory (default: ~/.cache/video-summarizer/nltk_data)")
+    parser.add_argument("--offline-nltk", action="store_true", help="never download nltk corpora")
+    parser.add_argument("--webhook-listen", default=None, metavar="HOST:PORT",
+                        help="receive DeepAffects results on this address instead of polling webhook.site")
+    parser.add_argument("--webhook-url", default=None,
+                        help="public address of --webhook-listen as seen by DeepAffects")
+    parser.add_argument("--vosk-model", default="model", help="Vosk model directory (--asr vosk)")
+    parser.add_argument("--mock-url", default="http://127.0.0.1:8765/asr",
+                        help="address of a running mockasr.py (--asr mock)")
+    parser.add_argument("--render", default="copy", choices=["copy", "progressive", "avi"],
+                        help="copy: compressed <video>_summary.mp4 cut with stream copy (default), "
+                             "progressive: the same as playable segments listed in <video>_summary.m3u, "
+                             "avi: uncompressed <video>.avi through moviepy (old behaviour)")
+    parser.add_argument("--segment-length", type=float, default=10.0,
+                        help="least seconds per segment with --render progressive")
+    parser.add_argument("--merge-gap", type=float, default=0.5,
+                        help="render kept ranges less than this many seconds apart as one")
+    parser.add_argument("--min-clip", type=float, default=0.0, help="widen shorter kept ranges to this many seconds")
+    parser.add_argument("--reencode", action="store_true",
+                        help="write a clipN.mp4 per segment and take its audio (slow, old behaviour)")
+    args = parser.parse_args(argv)
+    if args.flac and args.asr == "vosk":
+        parser.error("--flac cannot be used with --asr vosk, Vosk reads WAV segments")
+
+    import asr
+    import resources
+
+    if args.nltk_data:
+        resources.setDataDir(args.nltk_data)
+    resources.offline = args.offline_nltk
+
+    options = {}
+    if args.asr == "vosk":
+        options["model"] = args.vosk_model
+    elif args.asr == "mock":
+        options["url"] = args.mock_url
+    elif args.webhook_listen:
+        import collector
+
+        host, port = args.webhook_listen.rsplit(":", 1)
+        options["receiver"] = collector.WebhookReceiver(host, int(port), args.webhook_url)
+    backend = asr.backend(args.asr, **options)
+
+    if args.keyphrases or args.offline_wikipedia:
+        import keyphrases
+
+        keyphrases.setDefaultStore(keyphrases.KeyphraseStore(args.keyphrases or keyphrases.DEFAULT_PATH,
+                                                             offline=args.offline_wikipedia))
+
+    transcriptCache = None
+    if not args.no_cache:
+        import cache
+
+        transcriptCache = cache.TranscriptCache(args.cache or cache.DEFAULT_PATH, args.cache_size << 20)
+
+    pipeline = Pipeline(jobs=args.jobs)
+    options = dict(asr=backend, cache=transcriptCache, languageCode=args.language,
+                   workdir=args.workdir, parts=args.parts, maxSegment=args.max_segment, reencode=args.reencode, readers=args.readers, workers=args.workers,
+                   audioFormat="flac" if args.flac else "wav", sampleRate=args.sample_rate, topics=args.topics,
+                   seedCount=args.seed_topics, depth=args.expansion_depth, stopwordLanguages=args.stopwords,
+                   renderMode=args.render, mergeGap=args.merge_gap, minClip=args.min_clip,
+                   segmentLength=args.segment_length)
+    futures = [pipeline.submit(video, printProgress, **options) for video in args.videos]
+    status = 0
+    for video, future in zip(args.videos, futures):
+        try:
+            print("%s -> %s" % (video, future.result().output))
+        except Exception as e:
+            print("%s failed: %s" % (video, e))
+            status = 1
+    pipeline.shutdown()
+    resources.report()
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
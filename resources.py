@@ -0,0 +1,115 @@
+# Loads the NLP dependencies once per process instead of on every summary.
+# nltk corpora are looked up in DATA_DIR (or any nltk data path) and only
+# downloaded when missing and downloads are allowed; the heavy modules are
+# imported by the stage that needs them, or all at once by warmUp() so a
+# long running process pays the import time at startup:
+#
+#     python resources.py --download      # fetch the corpora into DATA_DIR
+#     python resources.py --offline       # check them and time the warm start
+import os
+import sys
+import time
+import argparse
+import importlib
+from threading import Lock
+
+DATA_DIR = os.environ.get("VIDEO_SUMMARIZER_NLTK_DATA",
+                          os.path.join(os.path.expanduser("~"), ".cache", "video-summarizer", "nltk_data"))
+
+# nltk package name: resource path inside an nltk data directory
+CORPORA = {"stopwords": "corpora/stopwords"}
+
+# modules imported by the summarize stage
+MODULES = ("numpy", "nltk", "sklearn.feature_extraction.text", "fuzzywuzzy.process")
+
+# never download, a missing corpus is an error
+offline = False
+
+_lock = Lock()
+_ready = set()
+timings = {}
+
+
+class ResourceError(Exception):
+    pass
+
+
+def _timed(name, fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+    return result
+
+
+def setDataDir(path):
+    global DATA_DIR
+    DATA_DIR = path
+
+
+# makes sure the nltk corpora are available, downloading missing ones into
+# DATA_DIR unless offline; cheap after the first call
+def ensure(packages=tuple(CORPORA)):
+    with _lock:
+        missing = [name for name in packages if name not in _ready]
+        if not missing:
+            return
+        nltk = _timed("import nltk", importlib.import_module, "nltk")
+        if DATA_DIR not in nltk.data.path:
+            nltk.data.path.insert(0, DATA_DIR)
+        for name in missing:
+            try:
+                _timed("find " + name, nltk.data.find, CORPORA[name])
+            except LookupError:
+                if offline:
+                    raise ResourceError("nltk corpus %s not found in %s, run: python resources.py --download"
+                                        % (name, ", ".join(nltk.data.path)))
+                if not _timed("download " + name, nltk.download, name, DATA_DIR, True):
+                    raise ResourceError("could not download nltk corpus %s" % name)
+            _ready.add(name)
+
+
+# imports the summarize stage's modules and loads its corpora and stopwords;
+# returns the seconds spent per step
+def warmUp():
+    for name in MODULES:
+        if name not in sys.modules:
+            _timed("import " + name, importlib.import_module, name)
+    ensure()
+    import nlp
+
+    _timed("load stopwords", nlp.stopwordSet)
+    return dict(timings)
+
+
+def report(out=sys.stdout):
+    for name, seconds in sorted(timings.items(), key=lambda item: -item[1]):
+        out.write("%-40s %7.3fs\n" % (name, seconds))
+    out.write("%-40s %7.3fs\n" % ("startup", sum(timings.values())))
+
+
+def main(argv=None):
+    global offline
+
+    parser = argparse.ArgumentParser(description="Check, download and time the NLP resources.")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="nltk data directory")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--download", action="store_true", help="only download the missing corpora")
+    group.add_argument("--offline", action="store_true", help="fail instead of downloading")
+    args = parser.parse_args(argv)
+
+    setDataDir(args.data_dir)
+    offline = args.offline
+    try:
+        if args.download:
+            ensure()
+        else:
+            warmUp()
+    except ResourceError as e:
+        print(e)
+        return 1
+    report()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,4 +1,8 @@
-from moviepy.editor import *
+import os
+import functools
+import cache
+import pipeline
+import timeline
 from PyQt5.QtCore import (pyqtSignal, pyqtSlot, Q_ARG, QAbstractItemModel,
                           QFileInfo, qFuzzyCompare, QMetaObject, QModelIndex, QObject, Qt,
                           QThread, QTime, QUrl)
@@ -6,7 +10,7 @@ from PyQt5.QtGui import QColor, qGray, QImage, QPainter, QPalette
 from PyQt5.QtMultimedia import (QAbstractVideoBuffer, QMediaContent,
                                 QMediaMetaData, QMediaPlayer, QMediaPlaylist, QVideoFrame, QVideoProbe)
 from PyQt5.QtMultimediaWidgets import QVideoWidget
-from PyQt5.QtWidgets import (QApplication, QComboBox, QDialog, QFileDialog,
+from PyQt5.QtWidgets import (QApplication, QCheckBox, QComboBox, QDialog, QFileDialog,
                              QFormLayout, QHBoxLayout, QLabel, QListView, QMessageBox, QPushButton,
                              QSizePolicy, QSlider, QStyle, QToolButton, QVBoxLayout, QWidget)
 
@@ -311,6 +315,31 @@ class HistogramWidget(QWidget):
         self.update()
 
 
+class PipelineReporter(QObject):
+    # emitted from the pipeline worker threads, delivered on the GUI thread
+    progress = pyqtSignal(str, str, float)
+    # the video, a rendered summary segment of it and its subtitles, in
+    # playback order
+    segment = pyqtSignal(str, str, object)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str, str)
+
+    def watch(self, video, future):
+        def done(future):
+            try:
+                self.finished.emit(future.result())
+            except Exception as e:
+                self.failed.emit(video, str(e))
+
+        future.add_done_callback(done)
+
+
+# the key of a local media file in Player.summaries: pipeline paths come
+# from os.path, playlist paths from QUrl.toLocalFile() with forward slashes
+def mediaKey(path):
+    return os.path.normcase(os.path.abspath(path))
+
+
 class Player(QWidget):
     fullScreenChanged = pyqtSignal(bool)
 
@@ -321,6 +350,25 @@ class Player(QWidget):
         self.trackInfo = ""
         self.statusInfo = ""
         self.duration = 0
+        # subtitles of the current summary, and of every summary file (by
+        # mediaKey) keyed by their (start, end) in seconds
+        self.subtitles = timeline.SubtitleTrack()
+        self.summaries = {}
+        # virtual summaries: playlist index -> (finished job, VirtualCut) of
+        # the items that play a source through its kept ranges (the source
+        # file keeps its own item), and the VirtualCut of the current item
+        self.virtualItems = {}
+        self.cut = None
+        # playlist index of the last summary segment of every video still
+        # being rendered (by mediaKey), the next one is inserted after it
+        self.lastSegments = {}
+
+        self.pipeline = pipeline.Pipeline(cache=cache.TranscriptCache())
+        self.pipelineReporter = PipelineReporter()
+        self.pipelineReporter.progress.connect(self.pipelineProgress)
+        self.pipelineReporter.segment.connect(self.pipelineSegment)
+        self.pipelineReporter.finished.connect(self.pipelineFinished)
+        self.pipelineReporter.failed.connect(self.pipelineFailed)
 
         self.player = QMediaPlayer()
         self.playlist = QMediaPlaylist()
@@ -366,6 +414,10 @@ class Player(QWidget):
         self.probe.setSource(self.player)
 
         openButton = QPushButton("Open", clicked=self.open)
+        # play summaries straight from the source, nothing is rendered
+        self.virtualBox = QCheckBox("Virtual cut")
+        self.exportButton = QPushButton("Export", clicked=self.export)
+        self.exportButton.setEnabled(False)
 
         controls = PlayerControls()
         controls.setState(self.player.state())
@@ -400,6 +452,8 @@ class Player(QWidget):
         controlLayout = QHBoxLayout()
         controlLayout.setContentsMargins(0, 0, 0, 0)
         controlLayout.addWidget(openButton)
+        controlLayout.addWidget(self.virtualBox)
+        controlLayout.addWidget(self.exportButton)
         controlLayout.addStretch(1)
         controlLayout.addWidget(controls)
         controlLayout.addStretch(1)
@@ -433,649 +487,75 @@ class Player(QWidget):
         self.addToPlaylist(playlist)
 
 
+    # queued jobs are dropped and running ones stop at their next stage, so
+    # closing the window does not wait for them
+    def closeEvent(self, event):
+        self.pipeline.shutdown(wait=False, cancel_futures=True)
+        super(Player, self).closeEvent(event)
+
     def open(self):
-        global vid
         fileNames, _ = QFileDialog.getOpenFileNames(self, "Open Files")
-        fx=fileNames[0]
-        fx = fx.split("/")
-        vid = str(fx[-1])
-
-        ##import apitestspeech
-        from threading import Thread
-        import requests
-        global a, b
-        a = 0
-        b = 0
-        import base64
-
-        url = "https://proxy.api.deepaffects.com/audio/generic/api/v1/async/asr"
-        # "https://webhook.site/9a465f54-10e2-44a7-b8d6-989c17c9bf50"
-        #
-
-        #audio_file_name = "mity.wav"
-        clip = VideoFileClip(vid)
-        #vid="apple.mp4"
-        clipA = VideoFileClip(vid)
-        clipB = VideoFileClip(vid)
-        clipC = VideoFileClip(vid)
-        clipD = VideoFileClip(vid)
-
-
-
-        # getting duration of the video
-
-        def intervals(parts, duration):
-            part_duration = duration / parts
-            return [(i * part_duration, (i + 1) * part_duration) for i in range(parts)]
-
-        duration = clip.duration
-        dur = (intervals(4, duration))
-
-        import moviepy.editor as mp
-        def a():
-            x1=dur[0][0]
-            y1=dur[0][1]
-            clip1 = clipA.subclip(x1,y1)
-            clip1.write_videofile("clip1.mp4")
-            clipa = mp.VideoFileClip(r"clip1.mp4")
-            clipa.audio.write_audiofile(r"v1.wav")
-
-        def b():
-            x2 = dur[1][0]
-            y2 = dur[1][1]
-
-            clip2 = clipB.subclip(x2, y2)
-            clip2.write_videofile("clip2.mp4")
-            clipb = mp.VideoFileClip(r"clip2.mp4")
-            clipb.audio.write_audiofile(r"v2.wav")
-
-        def c():
-            x3 = dur[2][0]
-            y3 = dur[2][1]
-
-            clip3 = clipC.subclip(x3, y3)
-            clip3.write_videofile("clip3.mp4")
-            clipc = mp.VideoFileClip(r"clip3.mp4")
-            clipc.audio.write_audiofile(r"v3.wav")
-
-        def d():
-            x4 = dur[3][0]
-            y4 = dur[3][1]
-
-            clip4 = clipD.subclip(x4, y4)
-            clip4.write_videofile("clip4.mp4")
-            clipd = mp.VideoFileClip(r"clip4.mp4")
-            clipd.audio.write_audiofile(r"v4.wav")
-
-        a1 = Thread(target=a)
-        a2 = Thread(target=b)
-        a3 = Thread(target=c)
-        a4 = Thread(target=d)
-        a1.start()
-        a2.start()
-        a3.start()
-        a4.start()
-        a1.join()
-        a2.join()
-        a3.join()
-        a4.join()
-
-        # Test: Final11: sample rate 1411000, enableSpeakerDiarization": False,audioType": "meeting
-        # Test2: Final12: sample rate 1411000, enableSpeakerDiarization": False,audioType": "meeting, lang: eng-GB
-        # Test3: Final13: sample rate 44100, enableSpeakerDiarization": False,audioType": "meeting,lang: eng-GB (uk)
-        # Test4: Final14: sample rate 44100, enableSpeakerDiarization": False,audioType": "meeting,lang: eng-US
-        def one():
-            querystring1 = {"apikey": "i8gDv4qSRMSjLaW3iFjCSvcPGPv16caE",
-                            "webhook": "https://webhook.site/7396dbb9-c236-4997-aa62-571c8aca0ce7"}
-            audio_file_name1 = "v1.wav"
-            with open(audio_file_name1, 'rb') as fin1:
-                audio_content1 = fin1.read()
-
-            payload1 = {"content": base64.b64encode(audio_content1).decode('utf-8'), "encoding": "WAV",
-                        "languageCode": "en-IN", "sampleRate": 44100, "audioType": "meeting",
-                        "enableSpeakerDiarization": False, "enablePunctuation": True}
-
-            # payload["content"] = base64.b64encode(audio_content1).decode('utf-8')
-            headers = {
-                'Content-Type': "application/json",
-            }
-            response = requests.post(url, json=payload1, headers=headers, params=querystring1)
-            print(response.text)
-
-        # SaWFpL5SZPtEhQYJRNKfFtXzxhhNcqwc
-        # Due2ogG7EZnO9SS94SDNlsycExyqBHCh
-        def two():
-            querystring2 = {"apikey": "YutmVabaOak8xQuHruvWuGsSURX7dY4N",
-                            "webhook": "https://webhook.site/a703f1c6-b728-4562-9eee-a91d299c6f8f"}
-            audio_file_name2 = "v2.wav"
-            with open(audio_file_name2, 'rb') as fin2:
-                audio_content2 = fin2.read()
-
-            payload2 = {"content": base64.b64encode(audio_content2).decode('utf-8'), "encoding": "WAV",
-                        "languageCode": "en-IN",
-                        "sampleRate": 44100, "audioType": "meeting",
-                        "enableSpeakerDiarization": False, "enablePunctuation": True}
-
-            # payload["content"] = base64.b64encode(audio_content2).decode('utf-8')
-            headers = {
-                'Content-Type': "application/json",
-            }
-            response = requests.post(url, json=payload2, headers=headers, params=querystring2)
-            print(response.text)
-
-        def three():
-            querystring3 = {"apikey": "G0phDz499IRPLCJHSObdmsGI131LXhlr",
-                            "webhook": "https://webhook.site/bb5f026f-6d96-46c8-ac50-5a4d45b79324"}
-
-            audio_file_name3 = "v3.wav"
-            with open(audio_file_name3, 'rb') as fin3:
-                audio_content3 = fin3.read()
-            payload3 = {"content": base64.b64encode(audio_content3).decode('utf-8'), "encoding": "WAV",
-                        "languageCode": "en-IN",
-                        "sampleRate": 44100, "audioType": "meeting",
-                        "enableSpeakerDiarization": False, "enablePunctuation": True}
-
-            # payload["content"] = base64.b64encode(audio_content3).decode('utf-8')
-            headers = {
-                'Content-Type': "application/json",
-            }
-            response = requests.post(url, json=payload3, headers=headers, params=querystring3)
-            print(response.text)
-
-        def four():
-            querystring4 = {"apikey": "n6oP99r1tGIZeyt77Zxn6LVMUKEtmhlw",
-                            "webhook": "https://webhook.site/a5d6f48a-b29e-4f8f-96a3-badb60823be4"}
-            audio_file_name4 = "v4.wav"
-            with open(audio_file_name4, 'rb') as fin4:
-                audio_content4 = fin4.read()
-            payload4 = {"content": base64.b64encode(audio_content4).decode('utf-8'), "encoding": "WAV",
-                        "languageCode": "en-IN",
-                        "sampleRate": 44100, "audioType": "meeting",
-                        "enableSpeakerDiarization": False, "enablePunctuation": True}
-
-            # payload["content"] = base64.b64encode(audio_content4).decode('utf-8')
-            headers = {
-                'Content-Type': "application/json",
-            }
-            response = requests.post(url, json=payload4, headers=headers, params=querystring4)
-            print(response.text)
-
-        flag = False
-        print("API CALL STARTED")
-        t1 = Thread(target=one)
-        t2 = Thread(target=two)
-        t3 = Thread(target=three)
-        t4 = Thread(target=four)
-        t1.start()
-        t2.start()
-        t3.start()
-        t4.start()
-        t1.join()
-        t2.join()
-        t3.join()
-        t4.join()
-
-        print("WEB SCRAPING STARTED")
-        def run1():
-            import webscrap
-
-        def run2():
-            import webscrap2
-
-        def run3():
-            import webscrap3
-
-        def run4():
-            import webscrap4
-
-        r1 = Thread(target=run1)
-        r2 = Thread(target=run2)
-        r3 = Thread(target=run3)
-        r4 = Thread(target=run4)
-        r1.start()
-        r2.start()
-        r3.start()
-        r4.start()
-        r1.join()
-        r2.join()
-        r3.join()
-        r4.join()
-
-        def sum():
-            print("NLP STARTED")
-            import wikipedia
-            from fuzzywuzzy import process
-            from fuzzywuzzy import fuzz
-            import copy
-            import numpy as np
-            def superImportant(topic):
-                content = wikipedia.summary(topic)
-                pageObj = wikipedia.WikipediaPage(topic)
-
-                hyperLinks1 = []
-                nonhyperLinks = content.split()
-                for words2 in pageObj.links:
-                    if words2 in content:
-                        hyperLinks1.append(words2)
-
-                contentWords = list(set(copy.deepcopy(hyperLinks1) + nonhyperLinks))
-
-                fails = 0
-
-                for words in hyperLinks1:
-                    try:
-                        content = wikipedia.summary(words)
-                        pageObj = wikipedia.WikipediaPage(words)
-                        count = 0
-                        for words2 in pageObj.links:
-                            if words2 in content:
-                                contentWords.append(words2)
-                                count += 1
-                            if count >= 1 * len(hyperLinks1):
-                                break
-                    except:
-                        fails += 1
-
-                contentWords = set((" ".join(contentWords)).split())
-                return contentWords
-
-            def changePriorities(dic, mapWords):
-                frequencies = []
-                for k, v in dic.items():
-                    frequencies.append(v)
-                X = copy.deepcopy(np.percentile(np.array(frequencies), 95))
-
-                misMatches = 0
-                for words in mapWords:
-                    if words in dic.keys():
-                        dic[words] = X
-                    elif words.lower() in dic.keys():
-                        dic[words.lower()] = X
-                    else:
-                        misMatches += 1
-
-                return dic, misMatches
-
-            import copy
-            import nltk
-            import numpy as np
-            import string
-            from sklearn.feature_extraction.text import CountVectorizer
-            from nltk.corpus import stopwords
-            from fuzzywuzzy import process
-            from fuzzywuzzy import fuzz
-            from scipy import stats
-            import matplotlib.pyplot as plt
-            nltk.download('wordnet')
-            nltk.download('stopwords')
-
-            def chunk(sourceFile, wordsPerLine=None, endLineAt=None):
-                fi = open(sourceFile, "r+")
-                text = fi.read()
-                text = text.replace("\n", "")
-
-                if wordsPerLine != None:
-                    text = text.split()
-                    for words in range(1, len(text) + 1):
-                        if words % 3 == 0:
-                            text[words - 1] = text[words - 1] + "\n"
-                    fi.seek(0)
-                    fi.write(" ".join(text))
-                if endLineAt != None:
-
-                    for words in endLineAt:
-                        text = text.split(words)
-                        text = "\n".join(text)
-
-                    fi.seek(0)
-                    fi.write(text)
-
-                fi.close()
-                return
+        for name in fileNames:
+            if self.virtualBox.isChecked():
+                future = self.pipeline.submit(name, self.pipelineReporter.progress.emit, renderMode="virtual")
+            else:
+                # summaries are rendered as segments that join the playlist as they are written
+                future = self.pipeline.submit(name, self.pipelineReporter.progress.emit, renderMode="progressive",
+                                              onSegment=functools.partial(self.pipelineReporter.segment.emit, name))
+            self.pipelineReporter.watch(name, future)
+            self.setStatusInfo("Queued %s" % QFileInfo(name).fileName())
+
+    def pipelineProgress(self, video, stage, fraction):
+        self.setStatusInfo("%s: %s (%d%%)" % (QFileInfo(video).fileName(), stage, fraction * 100))
+
+    # segments of a video follow each other in the playlist even while other
+    # videos add theirs
+    def pipelineSegment(self, video, path, subtitles):
+        self.summaries[mediaKey(path)] = subtitles
+        key = mediaKey(video)
+        if key in self.lastSegments:
+            index = self.lastSegments[key] + 1
+            self.insertToPlaylist(index, path)
+        else:
+            index = self.playlist.mediaCount()
+            self.addToPlaylist([path])
+        self.lastSegments[key] = index
+        # start on the first segment instead of waiting for the whole summary
+        if self.player.state() == QMediaPlayer.StoppedState:
+            self.playlist.setCurrentIndex(index)
+            self.player.play()
 
-            def getKey(D, val):
-                for key, value in D.items():
-                    if val == value:
-                        return key
-                return -1
-
-            def completeFiltering(singleStringTxt, multiLineTxt, limitOnFreq, limitOnDataW=10000):
-                wholeText = singleStringTxt
-                cleansed = wholeText.split()[:limitOnDataW]
-                table = str.maketrans("", "", string.punctuation)
-                cleansed = [w.translate(table) for w in cleansed]
-                patched = " ".join(cleansed)
-                cleansed = patched.split()
-                cleansed = [words for words in cleansed if not words.lower() in stopwords.words()]
-
-                cleansedTxt = " ".join(cleansed)
-
-                wholeText = [cleansedTxt]
-                lineWiseText = multiLineTxt
-
-                # list of text documents
-                # create the transform
-                vectorizer1 = CountVectorizer()
-                vectorizer2 = CountVectorizer()
-                # tokenize and build vocab
-                vectorizer1.fit(wholeText)
-                vectorizer2.fit(lineWiseText)
-
-                # summarize
-                wToInd1 = vectorizer1.vocabulary_
-                wToInd2 = vectorizer2.vocabulary_
-                # encode document
-                vector1 = vectorizer1.transform(wholeText)
-                vector2 = vectorizer2.transform(lineWiseText)
-                # summarize encoded vector
-                v1 = vector1.toarray()
-                v2 = vector2.toarray()
-
-                finalCount = np.sum(v1, axis=0, keepdims=False)
-
-                countDict1 = dict()
-
-                countDict2 = dict()
-                priorities2 = dict()
-                for ind in range(len(finalCount)):
-                    if finalCount[ind] >= limitOnFreq:
-                        countDict1[getKey(wToInd1, ind)] = finalCount[ind]
-
-                for lines in range(v2.shape[0]):
-                    countDict = dict()
-                    for ind in range(v2.shape[1]):
-                        if v2[lines][ind] >= limitOnFreq:
-                            countDict[getKey(wToInd2, ind)] = v2[lines][ind]
-
-                    priorities = sorted(countDict, key=countDict.get, reverse=True)
-
-                    countDict2[str(lines + 1)] = countDict
-                    priorities2[str(lines + 1)] = priorities
-
-                contentWords = superImportant("Information security")
-                countDict1, misMatch = changePriorities(countDict1, contentWords)
-                print("These many got mismatched in WIKEPIDA NEURAL NETWORK: ", misMatch)
-
-                priorities1 = sorted(countDict1, key=countDict1.get, reverse=True)
-
-                return priorities1, priorities2, countDict1, countDict2
-
-            def fuzzyWayCondense(fileSource, priorities1, priorities2, prioritiesMap1, prioritiesMap2, limitOnLines=3,
-                                 limitOnDataL=100, method="Frequency", printLineScores=False):
-                if method == "Frequency":
-                    priorities = priorities1
-                    prioritiesMap = prioritiesMap1
-                elif method == "TF-IDF":
-                    priorities = priorities1
-                    prioritiesMap = prioritiesMap1
-                    prioritiesMapext = prioritiesMap2
-                    includeTFIDF = np.zeros((limitOnDataL, len(priorities)))
-                fi = open(fileSource, "r")
-                include = np.zeros((limitOnDataL, len(priorities)))
-
-                wholeLines = fi.readlines()[:limitOnDataL]
-                maintain = dict()
-
-                for lines in range(1, limitOnDataL + 1):
-                    maintain[str(lines)] = []
-
-                fi.close()
-
-                for words in priorities:
-                    options = process.extract(words, wholeLines, limit=limitOnDataL)
-                    for line, score in options:
-
-                        if (words in line.split()) and method == "Frequency":
-                            maintain[str(wholeLines.index(line) + 1)].append(words)
-                            include[wholeLines.index(line)][priorities.index(words)] = score * prioritiesMap[words]
-                        elif (words in line.split()) and method == "TF-IDF":
-                            maintain[str(wholeLines.index(line) + 1)].append(words)
-                            includeTFIDF[wholeLines.index(line)][priorities.index(words)] = \
-                                prioritiesMapext[str(wholeLines.index(line) + 1)][words] * prioritiesMap[words]
-                if method == "TF-IDF":
-
-                    includeTFIDF = list(np.sum(includeTFIDF, axis=0))
-
-                    for words in priorities:
-                        options = process.extract(words, wholeLines, limit=limitOnDataL)
-                        for line, score in options:
-
-                            if (words in line.split()):
-                                include[wholeLines.index(line)][priorities.index(words)] = score * includeTFIDF[
-                                    priorities.index(words)]
-
-                for lines in range(1, limitOnDataL + 1):
-                    maintain[str(lines)] = set(maintain[str(lines)])
-
-                include = list(np.sum(include, axis=1))
-                includeTemp = np.array(copy.deepcopy(include))
-
-                if printLineScores == True:
-                    print("\nThe Scores of the Sentences from 1 to", limitOnDataL, " are as follows \n", include)
-                    print("\nThe Key Words Per Line for all the lines are : \n", maintain)
-
-                condensedLines = []
-                condensedLinesIndices = []
-                if limitOnLines != "NormSTDPick":
-                    includeTemp = (np.sort(includeTemp))[::-1]
-                    for i in range(limitOnLines):
-                        condensedLines.append(wholeLines[include.index(includeTemp[i])])
-                        condensedLinesIndices.append(include.index(includeTemp[i]) + 1)
-                        include[include.index(includeTemp[i])] = -1
-                else:
-                    includeTemp = np.array([(value >= np.percentile(includeTemp, 50)) for value in includeTemp]).astype(
-                        int)
-                    includeTemp = np.reshape(np.argwhere(includeTemp), (-1,)) + 1
-                    condensedLines = [wholeLines[i - 1] for i in includeTemp]
-                    condensedLinesIndices = includeTemp
-
-                condensedText = " ".join(condensedLines)
-
-                return condensedText, condensedLines, condensedLinesIndices
-
-            import json
-
-            T1path = "final1.txt"  # "/content/drive/My Drive/transcript1"
-            T2path = "final2.txt"  # "/content/drive/My Drive/transcript2"
-            T3path = "final3.txt"  # "/content/drive/My Drive/transcript3"
-            T4path = "final4.txt"  # "/content/drive/My Drive/transcript4"
-            Tpath = "1.txt"  # "/content/drive/My Drive/entireTranscript.txt"
-
-            transcript = ""
-            tpt1 = open(T1path, "r")
-            T1 = tpt1.read()
-            T1dict = eval(T1)
-            tpt1.close()
-
-            tpt2 = open(T2path, "r")
-            T2 = tpt2.read()
-            T2dict = eval(T2)
-            tpt2.close()
-
-            tpt3 = open(T3path, "r")
-            T3 = tpt3.read()
-            T3dict = eval(T3)
-            # T3dict = json.loads(T3dict.decode("utf-8"))
-            tpt3.close()
-
-            tpt4 = open(T4path, "r")
-            T4 = tpt4.read()
-            T4dict = eval(T4)
-            # T4dict = json.loads(T4dict.decode("utf-8"))
-            tpt4.close()
-
-            transcript += T1dict["response"]["transcript"]
-            transcript += T2dict["response"]["transcript"]
-            transcript += T3dict["response"]["transcript"]
-            transcript += T4dict["response"]["transcript"]
-
-            tpt = open(Tpath, "w")
-            tpt.write(transcript)
-            tpt.close()
-
-            # tpt  = open(Tpath,"r")
-            Tdicts = [T1dict, T2dict, T3dict, T4dict]
-            # print(tpt.read())
-
-            # RUN THIS CELL WITH SPECIFIED PATH TO LOAD ALL THE TEXT FILE AS STRING INTO "wholeText" AND TEXT FILE AS LINES INTO "lineWiseText"
-
-            # path = "/content/drive/My Drive/TedTranscript.txt" #Path of the file from the drive
-            path = Tpath  # "/content/drive/My Drive/entireTranscript.txt"
-
-            chunk(path, endLineAt=[".", "?"])
-
-            fi = open(path, "r")
-            wholeText = fi.read()
-            fi.seek(0)
-            totalWords = len((fi.read()).split())
-            fi.seek(0)
-            totalLines = len(fi.readlines())
-            fi.seek(0)
-            lineWiseText = fi.readlines()
-            fi.close()
-
-            # print("Total Lines present in the Source File is : ", totalLines)
-            # print("Total Words present in the source File is : ", totalWords)
-
-            # "completeFiltering" func takes "wholeText", "lineWiseText", "limitOnFreq" (let this be unchanged), "limitOnDataW" (this equals the "totalWords" in above cell)
-            # "completeFiltering" func returns priorities1,2 and countDict1,2 which are used more for internal purposes so I'm hiding these outputs
-            priorities1, priorities2, countDict1, countDict2 = completeFiltering(wholeText, lineWiseText, limitOnFreq=1,
-                                                                                 limitOnDataW=totalWords)
-
-            # print("\nTop Prior Words of 10K Words data : ", priorities1)
-            # print("\nTop Prior Words of every Line data : ", priorities2)
-
-            # "fuzzyWayCondense" func takes "path", "priorities1,2", "countDict1,2", "limitOnLines" (this is can be anything <= "totalLines"), "limitonDataL"(this equals the "totalLines" in above cell), "method" (let it be unchanged), "printLineScores"(let it be False setting it to True just prints scores which are of no use to u)
-            # "fuzzyWayCondense" func returns "condensedText"(optional use to u), "condensedLines"(optional use to u just gives list of line strings) ,"condensedLinesIndices1(u might need this)"
-            condensedText, condensedLines, condensedLinesIndices1 = fuzzyWayCondense(path, priorities1, priorities2,
-                                                                                     countDict1,
-                                                                                     countDict2,
-                                                                                     limitOnLines="NormSTDPick",
-                                                                                     limitOnDataL=totalLines,
-                                                                                     method="TF-IDF",
-                                                                                     printLineScores=False)
-            #print("\nThis is the TF-IDF Way : \n")
-            #print("\nThe Original Lines which made thorugh the filtering process  are the line numbers : \n",
-             #     condensedLinesIndices1)
-            # print("\nOverall the condensed Text : \n", condensedText)
-
-            # "fuzzyWayCondense" func takes "path", "priorities1,2", "countDict1,2", "limitOnLines" (this is can be anything <= "totalLines"), "limitonDataL"(this equals the "totalLines" in above cell), "method" (let it be unchanged), "printLineScores"(let it be False setting it to True just prints scores which are of no use to u)
-            # "fuzzyWayCondense" func returns "condensedText"(optional use to u), "condensedLines"(optional use to u just gives list of line strings) ,"condensedLinesIndices2(u might need this)"
-            # condensedText, condensedLines, condensedLinesIndices2 = fuzzyWayCondense(path,priorities1, priorities2,countDict1, countDict2, limitOnLines="NormSTDPick", limitOnDataL = totalLines, method = "Frequency", printLineScores=False)
-            # print("\nThis is the Frequency Way : \n")
-            # print("\nThe Original Lines which made thorugh the filtering process  are the line numbers : \n", condensedLinesIndices2)
-            # print("\nOverall the condensed Text : \n", condensedText)
-
-            # "finalSet" gives union of results of both methods
-            # finalSet =  set(condensedLinesIndices1).union(set(condensedLinesIndices2))
-            finalSet = set(condensedLinesIndices1)
-            print("\nConsider these lines as Important : ", finalSet)
-            print("\nPercentage of Condensation of initial Text is : {:.4f}%".format(
-               ((totalLines - len(finalSet)) / totalLines) * 100))
-
-            Jsonpath = "2.txt"  # "/content/drive/My Drive/entireJasonObj.txt"
-
-            correction = 0
-            for transcripts in range(4):
-                for times in Tdicts[transcripts]["response"]["words"]:
-                    times["start"] = times["start"] + correction
-                    times["end"] = times["end"] + correction
-                    mark = times["end"]
-
-                correction = mark
-
-            jsonObjs = {"response": dict()}
-            jsonObjs["response"]["words"] = T1dict["response"]["words"] + T2dict["response"]["words"] + \
-                                            T3dict["response"][
-                                                "words"] + T4dict["response"]["words"]
-            jsonObjs = str(jsonObjs)
-            json = open(Jsonpath, "w")
-            json.write(jsonObjs)
-            json.close()
-
-            pathr = Jsonpath  # "/content/drive/My Drive/tedxtJasonObject" # PATH TO THE TEXT FILE CONTAINING JASON OBJECT (DICTIONARY OF REQUEST ID, RESPONSE, TIMESTAMPS OF WORDS ....)
-            fi = open(pathr, "r")
-            fullDataDict = eval(fi.read())
-
-            def convert(seconds):
-                seconds = seconds % (24 * 3600)
-                hour = seconds // 3600
-                seconds %= 3600
-                minutes = seconds // 60
-                seconds %= 60
-
-                return "%d:%02d:%02d" % (hour, minutes, seconds)
-
-            wholeWords = wholeText.split()
-            wholeLines = lineWiseText
-            prevWordsCount = dict()
-            wds = 0
-            for sen in wholeLines:
-                prevWordsCount[str(wholeLines.index(sen) + 1)] = wds
-                wds += len(sen.split())
-
-            timeStamps = dict()
-
-            for line in finalSet:
-
-                try:
-                    startInd = prevWordsCount[str(line)]
-                    endInd = prevWordsCount[str(line + 1)] - 1
-                    # USE "convert" if u need the output time stamps to be in HH:MM:SS if not remove "convert"
-                    timeRange = (
-                        fullDataDict["response"]["words"][startInd]["start"],
-                        fullDataDict["response"]["words"][endInd]["end"])
-                    timeStamps[int(line)] = timeRange
-                    count = 1
-                except:
-                    print("")
-
-            c = 0
-            Stamps = []
-            for line in sorted(timeStamps):
-                c += 1
-                Stamps.append(timeStamps[line])
-
-            stamps1 = []
-            x = 0
-
-            for i in Stamps:
-                d = i[1] - i[0]
-                y = x + d
-                stamps1.append((x, y))
-                x = y
-
-
-
-            global ddd
-            ddd = dict(zip(stamps1,condensedLines))
-            print(ddd)
-           # print(Stamps)
-            clip = VideoFileClip(vid)
-            V = []
-            for t in range(0, len(Stamps)):
-                a = Stamps[t][0]
-                b = Stamps[t][1]
-                clipx = clip.subclip(a,b)
-                tempvid = clipx
-                V.append(tempvid)
-            # x concatinating both the clips
-            final = concatenate_videoclips(V)
-            vid1 = vid.replace("mp4", "avi")
-            final.write_videofile(vid1, codec='rawvideo')
-            print("FILE PROCESSING IS DONE")
-
-
-        sum()
-        a = fileNames[0]
-        a= fileNames[0].replace("lecture.mp4","lecture4.avi")
-        print(a)
-        fileNames.pop()
-        fileNames.append(a)
+    # inserts a local file at index, moving the indices kept for the items
+    # after it
+    def insertToPlaylist(self, index, path):
+        self.playlist.insertMedia(index, QMediaContent(QUrl.fromLocalFile(QFileInfo(path).absoluteFilePath())))
+        self.virtualItems = dict((i + 1 if i >= index else i, item) for i, item in self.virtualItems.items())
+        for key, i in self.lastSegments.items():
+            if i >= index:
+                self.lastSegments[key] = i + 1
+
+    def pipelineFinished(self, job):
+        self.lastSegments.pop(mediaKey(job.video), None)
+        if job.renderMode == "virtual":
+            # insertToPlaylist keeps the index this item's
+            self.virtualItems[self.playlist.mediaCount()] = (job, timeline.VirtualCut(job.stamps))
+            self.addToPlaylist([job.output])
+        elif job.renderMode != "progressive":
+            self.summaries[mediaKey(job.output)] = job.subtitles
+            self.addToPlaylist([job.output])
         print("ADDED TO PLAYLIST")
-        self.addToPlaylist(fileNames)
 
+    # writes the current virtual summary to a file and adds it to the playlist
+    def export(self):
+        item = self.virtualItems.get(self.playlist.currentIndex())
+        if item is not None:
+            job = item[0]
+            self.pipelineReporter.watch(job.video, self.pipeline.export(job))
+            self.setStatusInfo("Exporting %s" % QFileInfo(job.video).fileName())
 
+    def pipelineFailed(self, video, message):
+        self.lastSegments.pop(mediaKey(video), None)
+        self.setStatusInfo("%s failed: %s" % (QFileInfo(video).fileName(), message))
 
     def addToPlaylist(self, fileNames):
         for name in fileNames:
@@ -1093,6 +573,8 @@ class Player(QWidget):
 
     def durationChanged(self, duration):
         duration /= 1000
+        if self.cut is not None:
+            duration = self.cut.duration
 
         self.duration = duration
         self.slider.setMaximum(duration)
@@ -1100,6 +582,22 @@ class Player(QWidget):
     def positionChanged(self, progress):
         progress /= 1000
 
+        if self.cut is not None:
+            # jump over the parts of the source that are not in the summary
+            target = self.cut.follow(progress)
+            if target is None:
+                # end of the summary, on to the next item (or around again
+                # when the playlist repeats this one)
+                if self.playlist.nextIndex() == self.playlist.currentIndex():
+                    self.player.setPosition(int(self.cut.toSource(0) * 1000))
+                else:
+                    self.playlist.next()
+                return
+            if target != progress:
+                self.player.setPosition(int(target * 1000))
+                return
+            progress = self.cut.toSummary(progress)
+
         if not self.slider.isSliderDown():
             self.slider.setValue(progress)
 
@@ -1128,8 +626,25 @@ class Player(QWidget):
         self.playlistView.setCurrentIndex(
             self.playlistModel.index(position, 0))
 
+        location = self.playlist.media(position).canonicalUrl()
+        item = self.virtualItems.get(position)
+        if item is not None:
+            job, self.cut = item
+            self.subtitles = timeline.SubtitleTrack(job.subtitles)
+        else:
+            self.cut = None
+            self.subtitles = timeline.SubtitleTrack(self.summaries.get(mediaKey(location.toLocalFile())))
+        self.labelHistogram.setText("")
+        self.exportButton.setEnabled(item is not None)
+        # position updates drive the jumps between kept ranges
+        self.player.setNotifyInterval(100 if self.cut is not None else 1000)
+        if self.cut is not None:
+            self.durationChanged(0)
+
     def seek(self, seconds):
-        self.player.setPosition(seconds * 1000)
+        if self.cut is not None:
+            seconds = self.cut.toSource(seconds)
+        self.player.setPosition(int(seconds * 1000))
 
     def statusChanged(self, status):
         self.handleCursor(status)
@@ -1209,13 +724,10 @@ class Player(QWidget):
         self.labelDuration.setText(tStr)
 
         #ddd={(0, 36.400000000000006): " In just the past two months in the midst of enormous challenges this year, Our teams have remained focused and they haven't stopped Innovating were on an unbelievable pace of new product releases, delivering more new products this fall than ever before starting with upgrades to our powerful operating systems, as well as our other remarkable products, the incredibly capable and Affordable Apple Watch, SC, and Apple Watch Series 6 putting the future of Health on your wrist, an entirely new fitness experience with Apple\n", (36.400000000000006, 60.7): '  Fitness, plus a convenient way to subscribe to Apple services with Apple one, the new and more powerful 8th generation iPad and a stunning and versatile new iPad are the amazingly capable and compact homepod mini, and we began a new era for iPhone with iPhone 12 and for people who want the most out of their iPhone\n', (60.7, 62.5): '  The mack is stronger than ever\n', (62.5, 72.30000000000001): '  He continues to lead the industry in customer satisfaction as it has for over a decade and more customers than ever are choosing the Mac\n', (72.30000000000001, 80.70000000000002): '30% last quarter and the Mack is having its best year ever in the back continues to attract new users\n', (80.70000000000002, 88.90000000000002): '  Today, over 50% of buyers are new to the Mac, which is simply amazing and all around the world\n', (88.90000000000002, 96.60000000000001): ' People use the back to do remarkable things like the Mac itself, they challenge the status quo\n', (96.60000000000001, 110.30000000000003): " They make it, It's great to see how people use the Mac to do such amazing things\n", (110.30000000000003, 118.30000000000003): '  We announced that the Mac is taking another huge leap forward by transitioning to Apple silicon and we promised that the first Mac with app\n', (118.30000000000003, 124.2): " Our teams have been working tirelessly to deliver the best lineup of notebooks and desktops that we've ever had will\n", (124.2, 146.7): " We needed to develop a new set of Advanced Technologies so for the past several years we've had our teams working with this singular purpose of defining and building the next generation of Mac at the core of this effort is the Silicon we've been making Apple silicon for more than a decade, it's at the heart of iPhone, iPad and Apple Watch, And now we want to bring it to the Mac\n", (146.7, 165.10000000000002): " So the Mac can take a huge leap forward with Incredible performance, custom technology in Industry leading power efficiency of Apple silicon, and, as we said we're developing a family of chips we're going to transition the Mac line to these new Chips over the next couple of years will today\n", (165.10000000000002, 183.89999999999998): '  We are incredibly excited to announce our first step in this transition with our first chip designed specifically for the Mac and we call it and one and one has been optimized for most popular low power systems were small size and power efficiency are critically important\n', (183.89999999999998, 189.29999999999995): '  It is a stunningly capable chip and it ushers in a whole new era for the\n', (189.29999999999995, 195.10000000000002): "  Mac, now let's get started by spending a few minutes on a deep dive into this new chip with Johnny\n", (195.10000000000002, 203.3): ' I want is a brexel chip for the Mac and one was to deliver industry leading performance and features\n', (203.3, 217.5): 'Efficiency as a result and one delivers a giant leap in performance per watt and every Mac with M1 will be transformed into a completely different class of product system On chip or soc for the Mac\n', (217.5, 246.7): '  Technologies are combined into a single SOC, delivering a whole new level of efficiency, an amazing performance pictures of a unified memory architecture, or, um, a high bandwidth low latency memory into a single food within a custom package of the result, all of the Technologies in there so she can access the same data without cutting it between multiple pools of memory, improves performance and power efficiency\n', (246.7, 256.0): '  M1 is the first personal computer chip built using the interstate heating 5 nanometer process technology\n', (256.0, 268.70000000000005): "  The largest number of transistors we've ever put into a single chip, Someone has a mass of 16 billion transistors, and we use all of these transistors to give em one amazing performance and leading edge\n", (268.70000000000005, 291.5): '  Technologies and our goal is to make each of these Technologies best in class, the incredible performance of M1 start with the CPU, which features mm course high performance by efficiency or thread as efficiently as possible while maximizing performance in advancing it year after year and now with the huge improvements\n', (291.5, 299.5): " And I want when it comes to low power Silicon or a high performance car is the world's fastest\n"}
-        for i in ddd.keys():
-            if currentInfo >= i[1]:
-                continue
-            else:
-                txt=str(ddd[(i[0], i[1])])
-                self.labelHistogram.setText(txt)
-                break
+        # only redraw the subtitle when the cue changes
+        txt = self.subtitles.update(currentInfo)
+        if txt is not None:
+            self.labelHistogram.setText(str(txt))
 
 
 
@@ -0,0 +1,48 @@
+import pytest
+
+keyphrases = pytest.importorskip("keyphrases")
+
+
+def test_resolve_all_follows_normalization_and_redirects(tmp_path, monkeypatch):
+    store = keyphrases.KeyphraseStore(str(tmp_path / "keyphrases.sqlite"))
+    store.putPage("Mac", "", [], keyphrases.IMPORTED)
+    requests = []
+
+    def get(params):
+        requests.append(params)
+        return {"query": {
+            "normalized": [{"from": "apple silicon", "to": "Apple silicon"},
+                           {"from": "macintosh computer", "to": "Macintosh computer"},
+                           {"from": "mercury", "to": "Mercury"}],
+            "redirects": [{"from": "Macintosh computer", "to": "Macintosh"},
+                          {"from": "Apple silicon", "to": "Apple silicon"}],
+            "pages": [{"title": "Apple silicon"}, {"title": "Macintosh"},
+                      {"title": "Mercury", "pageprops": {"disambiguation": ""}},
+                      {"title": "Unbelievable pace", "missing": True}]}}
+
+    monkeypatch.setattr(store, "_get", get)
+    titles = store.resolveAll(["mac", "apple silicon", "macintosh computer", "mercury", "unbelievable pace"])
+    assert titles == {"mac": "Mac", "apple silicon": "Apple silicon", "macintosh computer": "Macintosh",
+                      "mercury": None, "unbelievable pace": None}
+    # one light query for the phrases not in the store, and no page is stored for them
+    assert len(requests) == 1
+    assert requests[0]["titles"].split("|") == ["apple silicon", "macintosh computer", "mercury",
+                                                "unbelievable pace"]
+    assert "links" not in requests[0]["prop"]
+    assert store.resolveAll(["apple silicon"]) == {"apple silicon": "Apple silicon"}
+    assert len(requests) == 2
+
+
+def test_resolve_all_batches(tmp_path, monkeypatch):
+    store = keyphrases.KeyphraseStore(str(tmp_path / "keyphrases.sqlite"))
+    batches = []
+
+    def get(params):
+        titles = params["titles"].split("|")
+        batches.append(len(titles))
+        return {"query": {"pages": [{"title": title} for title in titles]}}
+
+    monkeypatch.setattr(store, "_get", get)
+    phrases = ["Phrase %d" % i for i in range(keyphrases.RESOLVE_BATCH + 7)]
+    assert store.resolveAll(phrases) == dict((phrase, phrase) for phrase in phrases)
+    assert sorted(batches) == [7, keyphrases.RESOLVE_BATCH]
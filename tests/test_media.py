@@ -0,0 +1,50 @@
+import re
+import subprocess
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("moviepy")
+media = pytest.importorskip("media")
+
+
+def ffmpeg(*args):
+    return subprocess.run([media.FFMPEG, "-hide_banner"] + list(args), stderr=subprocess.PIPE,
+                          universal_newlines=True)
+
+
+def duration(path):
+    h, m, s = re.search(r"Duration: (\d+):(\d+):([\d.]+)", ffmpeg("-i", path).stderr).groups()
+    return int(h) * 3600 + int(m) * 60 + float(s)
+
+
+@pytest.fixture
+def ntscClip(tmp_path):
+    path = str(tmp_path / "ntsc.mp4")
+    proc = ffmpeg("-loglevel", "error", "-y", "-f", "lavfi", "-i", "testsrc=size=160x120:rate=30000/1001",
+                  "-f", "lavfi", "-i", "sine=frequency=440:sample_rate=44100", "-t", "30", "-c:v", "libx264",
+                  "-g", "30", "-pix_fmt", "yuv420p", "-c:a", "aac", "-shortest", path)
+    if proc.returncode != 0:
+        pytest.skip("ffmpeg cannot encode H.264/AAC here: " + proc.stderr)
+    return path
+
+
+def test_stream_info_timescale(ntscClip):
+    info = media.streamInfo(ntscClip)
+    assert info["video"] == "h264"
+    assert info["audio"] == "aac"
+    # ffmpeg prints it as "30k tbn"
+    assert info["tbn"] == 30000
+
+
+def test_banner_timescale_suffix(ntscClip):
+    assert media._bannerStreams(ntscClip)["tbn"] == 30000
+
+
+def test_render_ntsc_duration(ntscClip, tmp_path):
+    cuts = [(1.3, 7.9), (10.2, 14.6), (20.5, 26.0)]
+    output = str(tmp_path / "summary.mp4")
+    media.renderCuts(ntscClip, cuts, output, str(tmp_path), workers=2)
+    expected = sum(end - start for start, end in cuts)
+    # every piece may run a frame or an audio packet long, never hours
+    assert expected - 0.2 <= duration(output) <= expected * 1.1
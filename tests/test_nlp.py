@@ -0,0 +1,108 @@
+import os
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+nlp = pytest.importorskip("nlp")
+media = pytest.importorskip("media")
+
+
+def sentencesAt(times):
+    return [nlp.Sentence(i, "line %d" % i, 0, 1, start, end) for i, (start, end) in enumerate(times)]
+
+
+def test_split_timeline_cue_on_group_boundary():
+    # every range starts with a sentence, so every group's first cue starts
+    # exactly where the previous group's float length sum ends
+    rng = random.Random(7)
+    for trial in range(300):
+        times = []
+        t = rng.uniform(0, 2)
+        for i in range(rng.randint(2, 40)):
+            length = rng.uniform(0.05, 4.0)
+            times.append((t, t + length))
+            t += length + rng.choice([0.0, 0.1, rng.uniform(0.6, 5.0)])
+        sentences = sentencesAt(times)
+        merged = nlp.mergeStamps(times, gap=0.5)
+        cues = nlp.rangeCues(sentences, merged)
+        groups = media.groupCuts(merged, rng.uniform(0.5, 10.0))
+        parts = nlp.splitTimeline(cues, groups)
+
+        assert sum(len(part) for part in parts) == len(sentences)
+        texts = [text for part in parts for (start, end), text in sorted(part.items())]
+        assert texts == [sentence.text for sentence in sentences]
+        for group, part in zip(groups, parts):
+            length = sum(end - start for start, end in group)
+            for start, end in part:
+                assert -1e-9 <= start < end <= length + 1e-9
+
+
+def test_summary_timeline_matches_split():
+    times = [(0.1, 0.30000000000000004), (0.30000000000000004, 0.7), (3.7211461264797583, 5.0), (9.0, 9.5)]
+    merged = nlp.mergeStamps(times, gap=0.5)
+    cues = nlp.rangeCues(sentencesAt(times), merged)
+    whole = nlp.summaryTimeline(sentencesAt(times), merged)
+    parts = nlp.splitTimeline(cues, [[range_] for range_ in merged])
+    assert len(whole) == sum(len(part) for part in parts) == len(times)
+    assert [len(part) for part in parts] == [2, 1, 1]
+
+
+# keyword priorities as completeFiltering builds them, without the stopwords
+# and the wikipedia expansion
+def keywordPriorities(lines):
+    from sklearn.feature_extraction.text import CountVectorizer
+
+    vectorizer = CountVectorizer(stop_words="english")
+    counts = np.asarray(vectorizer.fit_transform([" ".join(lines)]).sum(axis=0)).ravel()
+    prioritiesMap1 = dict(zip(nlp.vocabularyTerms(vectorizer), counts))
+    priorities1 = sorted(prioritiesMap1, key=prioritiesMap1.get, reverse=True)
+    vectorizer = CountVectorizer()
+    vector = vectorizer.fit_transform(lines).tocsr()
+    terms = nlp.vocabularyTerms(vectorizer)
+    prioritiesMap2 = dict()
+    for i in range(vector.shape[0]):
+        row = vector.getrow(i)
+        prioritiesMap2[str(i + 1)] = dict(zip(terms[row.indices], row.data))
+    return priorities1, prioritiesMap1, prioritiesMap2
+
+
+@pytest.mark.parametrize("method", ["Frequency", "TF-IDF"])
+def test_indexed_engine_matches_fuzzywuzzy(method):
+    pytest.importorskip("sklearn")
+    pytest.importorskip("fuzzywuzzy")
+    path = os.path.join(os.path.dirname(__file__), "data", "keynote.txt")
+    with open(path) as fin:
+        wholeLines = fin.readlines()
+    priorities, prioritiesMap, prioritiesMapext = keywordPriorities(wholeLines)
+
+    includes = []
+    for include in (nlp.indexedInclude, nlp.extractInclude):
+        maintain = dict((str(line), []) for line in range(1, len(wholeLines) + 1))
+        includes.append(include(wholeLines, priorities, prioritiesMap, prioritiesMapext, method, len(wholeLines),
+                                maintain))
+    assert np.array_equal(includes[0], includes[1])
+
+    condensed = [nlp.fuzzyWayCondense(path, priorities, None, prioritiesMap, prioritiesMapext, limitOnLines=5,
+                                      limitOnDataL=len(wholeLines), method=method, engine=engine)
+                 for engine in ("indexed", "fuzzywuzzy")]
+    assert condensed[0][0] == condensed[1][0]
+    assert list(condensed[0][2]) == list(condensed[1][2])
+
+
+def test_detect_topics_resolves_candidates_together(tmp_path, monkeypatch):
+    pytest.importorskip("sklearn")
+    keyphrases = pytest.importorskip("keyphrases")
+    monkeypatch.setattr(nlp, "stopwordSet", lambda languages=None: frozenset(["the", "a", "of", "is", "and", "don't"]))
+    store = keyphrases.KeyphraseStore(str(tmp_path / "keyphrases.sqlite"), offline=True)
+    store.putPage("Apple", "", [], keyphrases.IMPORTED)
+    store.putPage("Mac", "", [], keyphrases.IMPORTED)
+    resolved = []
+    resolveAll = store.resolveAll
+    monkeypatch.setattr(store, "resolveAll", lambda phrases: resolved.append(list(phrases)) or resolveAll(phrases))
+    path = os.path.join(os.path.dirname(__file__), "data", "keynote.txt")
+    with open(path) as fin:
+        lines = fin.readlines()
+    topics = nlp.detectTopics(lines, count=2, store=store)
+    assert sorted(topics) == ["Apple", "Mac"]
+    assert len(resolved) == 1 and len(resolved[0]) == 30
@@ -0,0 +1,38 @@
+import threading
+from concurrent.futures import Future
+
+import pytest
+
+pipeline = pytest.importorskip("pipeline")
+
+
+def test_collect_stops_when_cancelled(tmp_path):
+    cancelled = threading.Event()
+    job = pipeline.Job(str(tmp_path / "lecture.mp4"), asr=object(), cancelled=cancelled)
+    transcript = Future()
+    job.pending = [transcript]
+    threading.Timer(0.2, cancelled.set).start()
+    with pytest.raises(pipeline.Cancelled):
+        pipeline.collect(job)
+    assert transcript.cancelled()
+
+
+def test_run_stops_before_the_first_stage(tmp_path):
+    cancelled = threading.Event()
+    cancelled.set()
+    job = pipeline.Job(str(tmp_path / "lecture.mp4"), asr=object(), cancelled=cancelled)
+    with pytest.raises(pipeline.Cancelled):
+        pipeline.run(job)
+
+
+def test_job_rejects_segments_the_backend_cannot_read(tmp_path):
+    asr = pytest.importorskip("asr")
+    vosk = asr.VoskBackend.__new__(asr.VoskBackend)
+    with pytest.raises(ValueError, match="vosk backend cannot read flac"):
+        pipeline.Job(str(tmp_path / "lecture.mp4"), asr=vosk, audioFormat="flac")
+    pipeline.Job(str(tmp_path / "lecture.mp4"), asr=vosk, audioFormat="wav")
+
+
+def test_flac_with_vosk_is_a_usage_error():
+    with pytest.raises(SystemExit):
+        pipeline.main(["lecture.mp4", "--asr", "vosk", "--flac"])
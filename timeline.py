@@ -0,0 +1,82 @@
+# Summary timelines for playback without a rendered file.  A VirtualCut maps
+# between the source video's time and the time of the summary made of its
+# kept (start, end) ranges played back to back, so the player can seek the
+# original video from range to range and show summary time on its slider.
+from bisect import bisect_right
+
+
+class VirtualCut(object):
+
+    def __init__(self, stamps):
+        self.starts = [float(start) for start, end in stamps]
+        self.ends = [float(end) for start, end in stamps]
+        # summary time at which every range starts
+        self.offsets = []
+        position = 0.0
+        for start, end in zip(self.starts, self.ends):
+            self.offsets.append(position)
+            position += end - start
+        self.duration = position
+
+    def __len__(self):
+        return len(self.starts)
+
+    # source time of summary time t
+    def toSource(self, t):
+        if not self.starts:
+            return 0.0
+        i = max(bisect_right(self.offsets, t) - 1, 0)
+        return self.starts[i] + min(max(t - self.offsets[i], 0.0), self.ends[i] - self.starts[i])
+
+    # summary time of source time position; positions between ranges map to
+    # the end of the range before them
+    def toSummary(self, position):
+        i = bisect_right(self.starts, position) - 1
+        if i < 0:
+            return 0.0
+        return self.offsets[i] + min(position - self.starts[i], self.ends[i] - self.starts[i])
+
+    # where playback at source time position should be: position itself
+    # inside a range, the start of the next range otherwise, None after the
+    # last one.  tolerance absorbs seeks landing slightly early and position
+    # updates arriving slightly late.
+    def follow(self, position, tolerance=0.05):
+        i = bisect_right(self.starts, position + tolerance) - 1
+        if i >= 0 and position < self.ends[i] - tolerance:
+            return position
+        if i + 1 < len(self.starts):
+            return self.starts[i + 1]
+        return None
+
+
+# Subtitles {(start, end): text} of one media, looked up by time with bisect.
+# at(t) is the first cue that has not ended by t (so the next cue shows in
+# the pause before it), or None after the last one.
+class SubtitleTrack(object):
+
+    def __init__(self, cues=None):
+        cues = sorted((cues or {}).items())
+        self.starts = [start for (start, end), text in cues]
+        self.ends = [end for (start, end), text in cues]
+        self.texts = [text for (start, end), text in cues]
+        # index of the cue last returned by update()
+        self.active = None
+
+    def __len__(self):
+        return len(self.texts)
+
+    def index(self, t):
+        i = bisect_right(self.ends, t)
+        return i if i < len(self.ends) else None
+
+    def at(self, t):
+        i = self.index(t)
+        return self.texts[i] if i is not None else None
+
+    # the text of the cue at t if it differs from the last update's, else None
+    def update(self, t):
+        i = self.index(t)
+        if i is None or i == self.active:
+            return None
+        self.active = i
+        return self.texts[i]
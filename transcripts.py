@@ -0,0 +1,116 @@
+# Compact on-disk transcripts instead of str(dict) files read back with eval.
+# A transcript is stored as an uncompressed .npz of flat arrays:
+#
+#     words      uint8    the UTF-8 words, back to back (a string table)
+#     bounds     uint32   n + 1 byte offsets of the words in `words`
+#     start, end float32  n word timings in seconds
+#     text       uint8    the UTF-8 transcript sentence string
+#
+# load() memory-maps the arrays straight out of the .npz, so opening a 10k
+# word transcript reads nothing but the zip directory, and the timing arrays
+# are sliced and merged with NumPy.
+import zipfile
+import numpy as np
+
+
+class Transcript(object):
+
+    def __init__(self, words, bounds, start, end, text):
+        self._words = words
+        self.bounds = bounds
+        self.start = start
+        self.end = end
+        self._text = text
+
+    @classmethod
+    def fromResult(cls, result):
+        response = result["response"]
+        encoded = [w["word"].encode("utf-8") for w in response["words"]]
+        bounds = np.zeros(len(encoded) + 1, dtype=np.uint32)
+        bounds[1:] = np.cumsum([len(w) for w in encoded])
+        return cls(np.frombuffer(b"".join(encoded), dtype=np.uint8), bounds,
+                   np.array([w["start"] for w in response["words"]], dtype=np.float32),
+                   np.array([w["end"] for w in response["words"]], dtype=np.float32),
+                   np.frombuffer(response["transcript"].encode("utf-8"), dtype=np.uint8))
+
+    def __len__(self):
+        return len(self.start)
+
+    def word(self, i):
+        return bytes(self._words[self.bounds[i]:self.bounds[i + 1]]).decode("utf-8")
+
+    @property
+    def words(self):
+        return [self.word(i) for i in range(len(self))]
+
+    @property
+    def text(self):
+        return bytes(self._text).decode("utf-8")
+
+    # the {"response": {"transcript", "words"}} dict the ASR returned
+    def toResult(self):
+        words = [{"word": w, "start": float(a), "end": float(b)} for w, a, b in zip(self.words, self.start, self.end)]
+        return {"response": {"transcript": self.text, "words": words}}
+
+    def save(self, path):
+        np.savez(path, words=self._words, bounds=self.bounds, start=self.start, end=self.end, text=self._text)
+        return path
+
+
+def save(path, result):
+    return Transcript.fromResult(result).save(path)
+
+
+def load(path):
+    arrays = _mapNpz(path)
+    return Transcript(arrays["words"], arrays["bounds"], arrays["start"], arrays["end"], arrays["text"])
+
+
+# every array of an uncompressed .npz as a read only np.memmap
+def _mapNpz(path):
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, "rb") as fin:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError("%s: %s is compressed and cannot be mapped" % (path, info.filename))
+            # the member data follows its local header: 30 bytes plus name and extra field
+            fin.seek(info.header_offset + 26)
+            nameLength, extraLength = np.frombuffer(fin.read(4), dtype="<u2")
+            fin.seek(info.header_offset + 30 + int(nameLength) + int(extraLength))
+            version = np.lib.format.read_magic(fin)
+            if version == (1, 0):
+                shape, fortran, dtype = np.lib.format.read_array_header_1_0(fin)
+            else:
+                shape, fortran, dtype = np.lib.format.read_array_header_2_0(fin)
+            name = info.filename[:-len(".npy")]
+            if 0 in shape:
+                arrays[name] = np.zeros(shape, dtype=dtype)
+            else:
+                arrays[name] = np.memmap(fin, dtype=dtype, mode="r", offset=fin.tell(), shape=shape,
+                                         order="F" if fortran else "C")
+    return arrays
+
+
+# one timeline from the per segment transcripts: the words of segment i are
+# shifted by offsets[i], or without offsets by the end of the previous
+# segment's last word
+def merge(parts, offsets=None):
+    shifts = []
+    correction = 0.0
+    for i, part in enumerate(parts):
+        if offsets is not None:
+            correction = offsets[i]
+        shifts.append(correction)
+        if len(part):
+            correction = float(part.end[-1]) + correction
+
+    bounds = [np.zeros(1, dtype=np.uint32)]
+    size = 0
+    for part in parts:
+        bounds.append(np.asarray(part.bounds[1:], dtype=np.uint32) + size)
+        size += int(part.bounds[-1])
+    return Transcript(np.concatenate([np.asarray(part._words) for part in parts]),
+                      np.concatenate(bounds),
+                      np.concatenate([np.asarray(part.start) + np.float32(shift) for part, shift in zip(parts, shifts)]),
+                      np.concatenate([np.asarray(part.end) + np.float32(shift) for part, shift in zip(parts, shifts)]),
+                      np.concatenate([np.asarray(part._text) for part in parts]))
@@ -1,30 +1,41 @@
-import json
-import requests
-#https://webhook.site/token/0cc50c80-7812-4684-b669-e88944dcffa4
-#https://webhook.site/token/729fb752-49b8-4157-b7d8-c174be6ca8b2
-def getw1():
-    URLw1 = 'https://webhook.site/token/7396dbb9-c236-4997-aa62-571c8aca0ce7'
-    pagew1 = requests.get(URLw1)
-    varw1=pagew1.content
-    idw1=varw1.decode('utf-8')
-    id1w1=json.loads(idw1)
-    idnumw1=id1w1['latest_request_id']
-    return idnumw1
-def json_callw1(idfw1):
-    URLw1 = 'https://webhook.site/token/7396dbb9-c236-4997-aa62-571c8aca0ce7/request/' + str(idfw1) + '/raw'
-    pagew1 = requests.get(URLw1)
-    varw1 = pagew1.content
-   # txtw1 = varw1.decode('utf-8')
-    txtdw1 = json.loads(varw1)
-    print(pagew1.content)
-    file1 = open('final1.txt', 'w')
-    file1.truncate(0)
-    file1.write(str(txtdw1)+"\n")
-    file1.close()
-
-idiw1=getw1()
-idfw1=getw1()
-while(idfw1==idiw1):
-    idfw1=getw1()
-print(idfw1,"hello")
-json_callw1(idfw1)
+# Fetches DeepAffects transcripts posted to the webhook.site tokens in asr.KEYS
+# (segment n uses KEYS[n - 1]).  These are plain functions: every call waits on
+# its own future, so a long running process can fetch any number of segments
+# and videos, in a row or at the same time.
+#
+#     python webscrap.py 1        # wait for the next transcript of segment 1
+import os
+import sys
+import asr
+import collector
+import transcripts
+
+_poller = collector.WebhookSitePoller()
+
+
+# call before uploading the segment, returns a Future of its transcript dict
+def expect(segment):
+    return _poller.expect(asr.KEYS[segment - 1][1])
+
+
+# writes finalN.npz (see transcripts.py) into the job's directory (the
+# current one by default)
+def save(segment, result, job=None):
+    return transcripts.save(os.path.join(job or ".", "final%d.npz" % segment), result)
+
+
+def fetch(segment, job=None, future=None):
+    if future is None:
+        future = expect(segment)
+    return save(segment, future.result(), job)
+
+
+# waits for all segments at once, pending are the futures from expect()
+def fetchAll(segments, job=None, pending=None):
+    if pending is None:
+        pending = [expect(segment) for segment in segments]
+    return [fetch(segment, job, future) for segment, future in zip(segments, pending)]
+
+
+if __name__ == '__main__':
+    print(fetch(int(sys.argv[1]) if len(sys.argv) > 1 else 1))